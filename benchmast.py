@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+"""
+Time MAST decoding.
+
+Usage: benchmast.py [-n ITERATIONS] FILE.mast...
+
+For example, to time the boot corpus: benchmast.py boot/*.mast
+"""
+
+import sys
+import time
+
+from typhon.load.nano import InvalidMAST, loadMASTBytes
+
+
+def entryPoint(argv):
+    iterations = 10
+    paths = argv[1:]
+    if len(paths) >= 2 and paths[0] == "-n":
+        iterations = int(paths[1])
+        paths = paths[2:]
+    if not paths or iterations <= 0:
+        print "Usage: benchmast.py [-n ITERATIONS] FILE.mast..."
+        return 1
+
+    total = 0.0
+    totalBytes = 0
+    for path in paths:
+        with open(path, "rb") as handle:
+            bs = handle.read()
+        start = time.time()
+        try:
+            for _ in range(iterations):
+                loadMASTBytes(bs, path.decode("utf-8"))
+        except InvalidMAST:
+            print "Invalid MAST:", path
+            return 1
+        elapsed = (time.time() - start) / iterations
+        total += elapsed
+        totalBytes += len(bs)
+        print "%s: %d bytes, %f ms" % (path, len(bs), elapsed * 1000)
+    print "Total: %d bytes, %f ms per pass" % (totalBytes, total * 1000)
+    return 0
+
+
+def target(driver, *args):
+    driver.exe_name = "mt-bench-mast"
+    return entryPoint, None
+
+
+if __name__ == "__main__":
+    sys.exit(entryPoint(sys.argv))
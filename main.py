@@ -31,9 +31,9 @@ macropy.exporter = SaveExporter("exported", "typhon")
 
 from rpython.jit.codewriter.policy import JitPolicy
 from rpython.rlib import rsignal
-# from rpython.rlib import rvmprof
 from rpython.rlib.debug import debug_print
 from rpython.rlib.jit import set_user_param
+from rpython.rlib.rvmprof import VMProfError
 
 from typhon import rsodium, ruv
 from typhon.arguments import Configuration
@@ -41,7 +41,7 @@ from typhon.debug import enableDebugPrint, TyphonJitHooks
 from typhon.errors import LoadFailed, UserException
 from typhon.importing import obtainModule
 from typhon.log import log
-from typhon.metrics import globalRecorder
+from typhon.metrics import globalRecorder, hotRates, latencies
 from typhon.nanopass import CompilerFailed
 from typhon.objects.auditors import deepFrozenGuard
 from typhon.objects.collections.maps import ConstMap, monteMap, unwrapMap
@@ -52,7 +52,8 @@ from typhon.objects.refs import resolution
 from typhon.objects.root import tieMirandaKnot
 from typhon.objects.slots import finalBinding
 from typhon.prelude import registerGlobals
-from typhon.profile import registerProfileTyphon
+from typhon.profile import profiler
+from typhon.tracing import tracer
 from typhon.scopes.boot import bootScope
 from typhon.scopes.safe import safeScope
 from typhon.scopes.unsafe import unsafeScope
@@ -101,60 +102,90 @@ def loadPrelude(config, recorder, vat):
     return prelude
 
 
+class FrozenPrelude(object):
+    """
+    A prelude which was evaluated during translation.
+
+    The prelude is DeepFrozen, so once it has been evaluated, its objects can
+    be prebuilt into the translated binary and shared by every run.
+    """
+
+    prelude = None
+
+frozenPrelude = FrozenPrelude()
+
+
+def freezePrelude(libraryPath):
+    """
+    Evaluate the prelude from `libraryPath` and save it for translation.
+
+    NOT_RPYTHON
+    """
+
+    from typhon.importing import compileCache, moduleCache
+    from typhon.metrics import Recorder
+
+    config = Configuration(["mt-typhon", "-l", libraryPath])
+    vat = Vat(None, None, name=u"prelude", checkpoints=-1)
+    with scopedVat(vat) as vat:
+        prelude = loadPrelude(config, Recorder(), vat)
+    if vat.hasTurns():
+        raise RuntimeError("Prelude queued turns; it cannot be frozen")
+    registerGlobals(prelude)
+    # The prelude's modules are reachable from its objects as needed; the
+    # caches themselves would only freeze build-time paths and compiled IR
+    # into the binary.
+    moduleCache.cache.clear()
+    compileCache.cache.clear()
+    frozenPrelude.prelude = prelude
+
+
 def runUntilDone(vatManager, uv_loop, recorder):
     # This may take a while.
+    ioHistogram = recorder.getHistogramFor("io")
     anyVatHasTurns = vatManager.anyVatHasTurns()
     while anyVatHasTurns or ruv.loopAlive(uv_loop):
-        for vat in vatManager.vats:
-            if vat.hasTurns():
-                with scopedVat(vat) as vat:
-                    with recorder.context(u"vatturn"):
-                        vat.takeSomeTurns()
+        vatManager.takeSomeTurns(recorder)
 
         if ruv.loopAlive(uv_loop):
             with recorder.context(u"io"):
-                ruv.cleanup()
-                try:
-                    if anyVatHasTurns:
-                        # More work to be done, so don't block.
-                        ruv.run(uv_loop, ruv.RUN_NOWAIT)
-                    else:
-                        # No more work to be done, so blocking is fine.
-                        ruv.run(uv_loop, ruv.RUN_ONCE)
-                except CompilerFailed as cf:
-                    debug_print("Caught fatal exception while reacting:",
-                            cf.formatError())
-                    raise
-                except UserException as ue:
-                    debug_print("Caught exception while reacting:",
-                            ue.formatError())
+                with ioHistogram.time():
+                    start = tracer.begin()
+                    ruv.cleanup()
+                    try:
+                        if anyVatHasTurns:
+                            # More work to be done, so don't block.
+                            ruv.run(uv_loop, ruv.RUN_NOWAIT)
+                        else:
+                            # No more work to be done, so blocking is fine.
+                            ruv.run(uv_loop, ruv.RUN_ONCE)
+                    except CompilerFailed as cf:
+                        debug_print("Caught fatal exception while reacting:",
+                                cf.formatError())
+                        raise
+                    except UserException as ue:
+                        debug_print("Caught exception while reacting:",
+                                ue.formatError())
+                    if tracer.enabled:
+                        tracer.record("reactor", "io", u"",
+                                      u"blocking" if not anyVatHasTurns
+                                      else u"polling", start)
 
         anyVatHasTurns = vatManager.anyVatHasTurns()
 
 
 class profiling(object):
-
-    def __init__(self, path, enabled):
-        self.path = path
-        self.enabled = enabled
+    """
+    Stop the profiler on the way out, however it was started.
+    """
 
     def __enter__(self):
-        # We can only enter once, since we must register the profile handles,
-        # and that is a one-time sort of thing.
-        if not self.enabled:
-            return
-
-        self.handle = open(self.path, "wb")
-        # Turn on vmprof, and *then* register the profile handles.
-        # rvmprof.enable(self.handle.fileno(), 0.00042)
-        registerProfileTyphon()
+        pass
 
     def __exit__(self, *args):
-        if not self.enabled:
-            return
-
-        # rvmprof.disable()
-        self.handle.close()
+        # The profiler might also have been started or stopped at runtime.
+        if profiler.isRunning():
+            profiler.stop()
 
 
 def cleanUpEverything():
@@ -186,6 +217,13 @@ def runTyphon(argv):
 
     config.enableLogging()
 
+    if config.metrics:
+        latencies.start()
+        hotRates.start()
+
+    if config.tracePath is not None:
+        tracer.start()
+
     if len(config.argv) < 2:
         print "No file provided?"
         return 1
@@ -202,7 +240,7 @@ def runTyphon(argv):
     # Initialize our first vat. It shall be immortal.
     vatManager = VatManager()
     vat = Vat(vatManager, uv_loop, checkpoints=-1)
-    vatManager.vats.append(vat)
+    vatManager.addVat(vat)
 
     # Update loop timing information. Until the loop really gets going, we
     # have to do this ourselves in order to get the timing correct for early
@@ -210,7 +248,10 @@ def runTyphon(argv):
     ruv.update_time(uv_loop)
     try:
         with scopedVat(vat) as vat:
-            prelude = loadPrelude(config, recorder, vat)
+            if frozenPrelude.prelude is None:
+                prelude = loadPrelude(config, recorder, vat)
+            else:
+                prelude = frozenPrelude.prelude
     except LoadFailed as lf:
         print lf
         return 1
@@ -256,7 +297,14 @@ def runTyphon(argv):
         # We are finished.
         return 0
 
-    with profiling("vmprof.log", config.profile):
+    if config.profile:
+        try:
+            profiler.start("vmprof.log", config.profileInterval)
+        except VMProfError as vpe:
+            print "Couldn't start vmprof:", vpe.msg
+            return 1
+
+    with profiling():
         # Update loop timing information.
         ruv.update_time(uv_loop)
         debug_print("Taking initial turn in script...")
@@ -289,6 +337,8 @@ def runTyphon(argv):
             recorder.stop()
             if config.metrics:
                 recorder.printResults()
+            if config.tracePath is not None:
+                tracer.dump(config.tracePath)
 
     # Clean up and exit.
     cleanUpEverything()
@@ -316,8 +366,12 @@ def jitpolicy(driver):
     return JitPolicy(TyphonJitHooks())
 
 
-def target(driver, *args):
+def target(driver, args):
     driver.exe_name = "mt-typhon"
+    # `--prelude <path>` evaluates the prelude from the MAST library at
+    # <path> now, so that the binary doesn't load it on every start.
+    if len(args) >= 2 and args[0] == "--prelude":
+        freezePrelude(args[1])
     return entryPoint, None
 
 
@@ -12,6 +12,10 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from rpython.rlib.rfloat import string_to_float
+
+from typhon.profile import DEFAULT_INTERVAL
+
 
 class ListStream(object):
 
@@ -50,9 +54,15 @@ class Configuration(object):
     # Whether to collect precise profiling statistics.
     profile = False
 
+    # How often the profiler samples, in seconds.
+    profileInterval = DEFAULT_INTERVAL
+
     # Whether to print metrics.
     metrics = False
 
+    # Where to write a trace of the VM's work at exit, if anywhere.
+    tracePath = None
+
     # User settings for the JIT. By default:
     # * The trace limit is over 9000 and prime.
     jit = "trace_limit=9001"
@@ -90,8 +100,12 @@ class Configuration(object):
                 self.loadOnly = True
             elif item == "-p":
                 self.profile = True
+            elif item == "--profile-interval":
+                self.profileInterval = string_to_float(stream.nextItem())
             elif item == "-m":
                 self.metrics = True
+            elif item == "--trace":
+                self.tracePath = stream.nextItem()
             elif item == "--jit":
                 self.jit = stream.nextItem()
             else:
@@ -102,4 +116,4 @@ class Configuration(object):
         tags = {}
         for tag in self.loggerTags:
             tags[tag] = None
-        log.logger.tags = tags
+        log.logger.setTags(tags)
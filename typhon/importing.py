@@ -14,13 +14,20 @@
 
 from rpython.rlib.jit import dont_look_inside
 from rpython.rlib.rpath import rjoin
+from rpython.rlib.rsha import RSHA
 
 from typhon import log
 from typhon.debug import debugPrint
 from typhon.errors import userError
 from typhon.load.nano import loadMASTBytes as nanoLoad
-from typhon.nano.interp import evalMonte
+from typhon.metrics import globalRecorder
+from typhon.nano.interp import (compileMonte, env2scope, evalMixed,
+                                mixCompiled)
 from typhon.objects.root import Object
+from typhon.tracing import currentVatName, tracer
+
+IMPORT = log.tagMask(["import"])
+IMPORT_ERROR = log.tagMask(["import", "error"])
 
 
 class ModuleCache(object):
@@ -34,6 +41,83 @@ class ModuleCache(object):
 moduleCache = ModuleCache()
 
 
+class CompiledModule(object):
+    """
+    The nanopass pipeline's output for some MAST, along with its most recent
+    mix.
+    """
+
+    outers = None
+    mixed = None
+
+    def __init__(self, environment, compiled):
+        self.names = {}
+        for name in environment:
+            self.names[name] = None
+        self.compiled = compiled
+
+    def hasNames(self, environment):
+        if len(environment) != len(self.names):
+            return False
+        for name in environment:
+            if name not in self.names:
+                return False
+        return True
+
+    def sameOuters(self, outers):
+        if self.outers is None or len(outers) != len(self.outers):
+            return False
+        for i, outer in enumerate(outers):
+            if outer is not self.outers[i]:
+                return False
+        return True
+
+    def eval(self, environment):
+        ast, outerNames, topLocalNames, localSize = self.compiled
+        outers = env2scope(outerNames, environment)
+        if not self.sameOuters(outers):
+            self.mixed = mixCompiled(ast, outers)
+            self.outers = outers
+        return evalMixed(self.mixed, topLocalNames, localSize)
+
+
+# The most modules which the compile cache holds before starting over.
+COMPILE_CACHE_SIZE = 256
+
+compileCacheRate = globalRecorder().getRateFor("Compile cache")
+
+
+class CompileCache(object):
+    """
+    Compiled modules, keyed on the SHA-1 digest of their MAST and their
+    origin.
+
+    The nanopass pipeline only depends upon the names in scope, and mixing
+    upon their values, so evaluating the same MAST again skips decoding and
+    the nanopasses, and, in the very same scope, mixing too.
+    """
+
+    def __init__(self):
+        self.cache = {}
+
+    def eval(self, module, environment):
+        key = module.cacheKey()
+        entry = self.cache.get(key, None)
+        if entry is not None and entry.hasNames(environment):
+            compileCacheRate.yes()
+        else:
+            compileCacheRate.no()
+            compiled = compileMonte(module.decode(), environment,
+                                    module.origin, False)
+            entry = CompiledModule(environment, compiled)
+            if len(self.cache) >= COMPILE_CACHE_SIZE:
+                self.cache.clear()
+            self.cache[key] = entry
+        return entry.eval(environment)
+
+compileCache = CompileCache()
+
+
 def tryExtensions(filePath, recorder):
     # Leaving this in loop form in case we change formats again.
     for extension in [".mast"]:
@@ -42,8 +126,12 @@ def tryExtensions(filePath, recorder):
             with open(path, "rb") as handle:
                 debugPrint("Reading:", path)
                 source = handle.read()
+                start = tracer.begin()
                 mod = AstModule(recorder, path.decode('utf-8'))
                 mod.load(source)
+                if tracer.enabled:
+                    tracer.record("import", "import", currentVatName(),
+                                  mod.origin, start)
                 return mod
         except IOError:
             continue
@@ -55,11 +143,13 @@ def obtainModule(libraryPaths, recorder, filePath):
         path = rjoin(libraryPath, filePath)
 
         if path in moduleCache.cache:
-            log.log(["import"], u"Importing %s (cached)" %
-                    path.decode("utf-8"))
+            if log.wants(IMPORT):
+                log.log(["import"], u"Importing %s (cached)" %
+                        path.decode("utf-8"))
             return moduleCache.cache[path]
 
-        log.log(["import"], u"Importing %s" % path.decode("utf-8"))
+        if log.wants(IMPORT):
+            log.log(["import"], u"Importing %s" % path.decode("utf-8"))
         code = tryExtensions(path, recorder)
         if code is None:
             continue
@@ -67,8 +157,9 @@ def obtainModule(libraryPaths, recorder, filePath):
         moduleCache.cache[path] = code
         return code
     else:
-        log.log(["import", "error"], u"Failed to import from %s" %
-                filePath.decode("utf-8"))
+        if log.wants(IMPORT_ERROR):
+            log.log(["import", "error"], u"Failed to import from %s" %
+                    filePath.decode("utf-8"))
         debugPrint("Failed to import:", filePath)
         raise userError(u"Module '%s' couldn't be found" %
                         filePath.decode("utf-8"))
@@ -83,10 +174,31 @@ class Module(Object):
 
 
 class AstModule(Module):
+    """
+    A module of MAST.
+
+    Decoding is put off until the module is evaluated, and skipped entirely
+    when the compile cache already has this MAST.
+    """
+
+    source = None
+    digest = None
+
     def load(self, source):
-        with self.recorder.context(u"mast"):
-            self.astSource = nanoLoad(source, self.origin)
+        self.source = source
+        self.digest = RSHA(source).digest()
+
+    def cacheKey(self):
+        return self.digest + self.origin.encode("utf-8")
+
+    def decode(self):
+        if self.astSource is None:
+            with self.recorder.context(u"mast"):
+                self.astSource = nanoLoad(self.source, self.origin)
+            # The decoded AST is kept instead.
+            self.source = None
+        return self.astSource
 
     @dont_look_inside
     def eval(self, env):
-            return evalMonte(self.astSource, env, self.origin, False)
+        return compileCache.eval(self, env)
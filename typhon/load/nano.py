@@ -2,6 +2,7 @@
 The MAST format, version zero, nanopass version.
 """
 
+from rpython.rlib.rarithmetic import LONG_BIT
 from rpython.rlib.rbigint import rbigint
 from rpython.rlib.rstruct.ieee import unpack_float
 from rpython.rlib.runicode import str_decode_utf_8
@@ -18,15 +19,20 @@ class InvalidMAST(Exception):
 
 MAGIC = "Mont\xe0MAST"
 
+# The widest shift at which another seven bits still fit into a non-negative
+# machine int.
+MAX_SMALL_SHIFT = LONG_BIT - 8
 
-class MASTStream(object):
 
-    index = 0
+class MASTStream(object):
 
-    def __init__(self, bytes, withSpans, source):
+    def __init__(self, bytes, withSpans, source, index=0):
         self.bytes = bytes
         self.withSpans = withSpans
         self.source = source
+        # Streams may start partway into their buffer, so that headers don't
+        # need to be sliced off of (potentially large) files.
+        self.index = index
 
     def exhausted(self):
         return self.index >= len(self.bytes)
@@ -48,6 +54,8 @@ class MASTStream(object):
         assert start >= 0, "Non-negative proof"
         stop = self.index + count
         assert stop >= 0, "Non-negative proof"
+        if stop > len(self.bytes):
+            raise InvalidMAST("nextBytes: Buffer underrun while streaming")
 
         rv = self.bytes[start:stop]
         self.index = stop
@@ -60,9 +68,27 @@ class MASTStream(object):
         except ValueError:
             raise InvalidMAST("Couldn't decode invalid double")
 
-    def nextVarInt(self):
+    def nextSmallVarInt(self):
+        """
+        Decode as much of a varint as fits into a machine int.
+
+        Returns the accumulated value, the shift reached, and whether the
+        varint continues past what was decoded.
+        """
+
         shift = 0
-        bi = rbigint.fromint(0)
+        i = 0
+        while shift <= MAX_SMALL_SHIFT:
+            b = ord(self.nextByte())
+            i |= (b & 0x7f) << shift
+            shift += 7
+            if not b & 0x80:
+                return i, shift, False
+        return i, shift, True
+
+    def finishVarInt(self, i, shift):
+        # The slow path, for varints too wide for a machine int.
+        bi = rbigint.fromint(i)
         cont = True
         while cont:
             b = ord(self.nextByte())
@@ -71,9 +97,20 @@ class MASTStream(object):
             cont = bool(b & 0x80)
         return bi
 
+    def nextVarInt(self):
+        i, shift, cont = self.nextSmallVarInt()
+        if cont:
+            return self.finishVarInt(i, shift)
+        return rbigint.fromint(i)
+
     def nextInt(self):
+        # Lengths, indices, and span coordinates nearly always fit into a
+        # machine int, so don't build a bigint for them.
+        i, shift, cont = self.nextSmallVarInt()
+        if not cont:
+            return i
         try:
-            return self.nextVarInt().toint()
+            return self.finishVarInt(i, shift).toint()
         except OverflowError:
             raise InvalidMAST("String length overflows integer bounds")
 
@@ -203,10 +240,14 @@ class MASTContext(object):
                     stream.nextSpan()))
             elif literalTag == 'I':
                 # Int. Read a varint and un-zz it.
-                bi = stream.nextVarInt()
-                shifted = bi.rshift(1)
-                if bi.int_and_(1).toint():
-                    shifted = shifted.int_xor(-1)
+                i, shift, cont = stream.nextSmallVarInt()
+                if cont:
+                    bi = stream.finishVarInt(i, shift)
+                    shifted = bi.rshift(1)
+                    if bi.int_and_(1).toint():
+                        shifted = shifted.int_xor(-1)
+                else:
+                    shifted = rbigint.fromint((i >> 1) ^ -(i & 1))
                 self.exprs.append(MastIR.IntExpr(shifted, stream.nextSpan()))
             elif literalTag == 'N':
                 # Null.
@@ -367,10 +408,11 @@ class MASTContext(object):
 def loadMASTBytes(bs, filename, noisy=False):
     if not bs.startswith(MAGIC):
         raise InvalidMAST("Wrong magic bytes '%s'" % bs[:len(MAGIC)])
-    bs = bs[len(MAGIC):]
+    if len(bs) == len(MAGIC):
+        raise InvalidMAST("Missing MAST version")
 
-    version = ord(bs[0])
-    bs = bs[1:]
+    # Don't slice the header off; that would copy the entire file, twice.
+    version = ord(bs[len(MAGIC)])
     if version == 0:
         withSpans = False
     elif version == 1:
@@ -379,7 +421,7 @@ def loadMASTBytes(bs, filename, noisy=False):
         raise InvalidMAST("Unsupported MAST version '%d'" % version)
 
     try:
-        stream = MASTStream(bs, withSpans, filename)
+        stream = MASTStream(bs, withSpans, filename, len(MAGIC) + 1)
         context = MASTContext(noisy)
         while not stream.exhausted():
             context.decodeNextTag(stream)
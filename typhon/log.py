@@ -1,11 +1,30 @@
 from functools import wraps
 
 from rpython.rlib.debug import debug_print
+from rpython.rlib.jit import promote
 
 """
 Simple tagged logger.
 """
 
+# Every tag which the VM logs with. Each tag gets a bit, so that call sites
+# can ask whether any of their tags are enabled before building a message.
+TAGS = ["audit", "deprecated", "error", "fs", "import", "info", "prelude",
+        "process", "ref", "serious", "sodium", "uv", "vat"]
+
+
+def tagMask(tags):
+    """
+    The bitset for a list of tags.
+
+    Call this at import time; an unknown tag is an error.
+    """
+
+    mask = 0
+    for tag in tags:
+        mask |= 1 << TAGS.index(tag)
+    return mask
+
 
 class Logger(object):
     """
@@ -13,8 +32,28 @@ class Logger(object):
     loggable.
     """
 
+    _immutable_fields_ = "mask?",
+
     def __init__(self):
         self.tags = {}
+        self.mask = 0
+
+    def setTags(self, tags):
+        self.tags = tags
+        mask = 0
+        for i, tag in enumerate(TAGS):
+            if tag in tags:
+                mask |= 1 << i
+        self.mask = mask
+
+    def wants(self, mask):
+        """
+        Whether a message with any of the tags in `mask` would be logged.
+
+        Guard the formatting of a message with this.
+        """
+
+        return bool(promote(self.mask) & mask)
 
     def log(self, tags, message):
         for tag in tags:
@@ -29,6 +68,7 @@ class Logger(object):
 
 logger = Logger()
 log = logger.log
+wants = logger.wants
 
 def deprecated(message):
     """
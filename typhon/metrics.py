@@ -1,9 +1,27 @@
 from __future__ import division
 
-from time import clock
+from time import time
 
 from rpython.rlib.debug import debug_print
 from rpython.rlib.listsort import make_timsort_class
+from rpython.rlib.rtime import (CLOCK_MONOTONIC, HAS_CLOCK_GETTIME, TIMESPEC,
+                                c_clock_gettime)
+from rpython.rtyper.lltypesystem import lltype, rffi
+
+
+def monotonic():
+    """
+    Seconds on a wall clock which never goes backwards.
+
+    Unlike the process clock, this keeps counting while we're blocked on I/O.
+    """
+
+    if HAS_CLOCK_GETTIME:
+        with lltype.scoped_alloc(TIMESPEC) as ts:
+            if c_clock_gettime(CLOCK_MONOTONIC, ts) == 0:
+                return (float(rffi.getintfield(ts, "c_tv_sec")) +
+                        float(rffi.getintfield(ts, "c_tv_nsec")) * 1e-9)
+    return time()
 
 
 def percent(part, whole):
@@ -48,6 +66,108 @@ class RecorderContext(object):
         self.recorder.popContext()
 
 
+class Switch(object):
+    """
+    A switch for some costly metric, which the JIT treats as constant.
+    """
+
+    _immutable_fields_ = "enabled?",
+
+    enabled = False
+
+    def start(self):
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+
+class Latencies(Switch):
+    """
+    Whether latency histograms are being recorded.
+
+    Reading the clock is a system call, so sends, turns, and the other timed
+    sections only read it while this is on.
+    """
+
+    def now(self):
+        """
+        The current time, or zero when latencies are off.
+        """
+
+        return monotonic() if self.enabled else 0.0
+
+latencies = Latencies()
+
+# Whether rates on the hottest paths, like method dispatch, are being counted.
+# They are only printed with the other metrics, so they are only counted when
+# Typhon is run with -m.
+hotRates = Switch()
+
+
+# Histogram buckets have upper bounds of powers of two of microseconds, from
+# 1us up to about 67s. One more bucket catches everything slower than that.
+BUCKETS = 27
+
+
+def bucketFor(seconds):
+    micros = seconds * 1000000
+    i = 0
+    while i < BUCKETS and micros > (1 << i):
+        i += 1
+    return i
+
+
+class Histogram(object):
+    """
+    A distribution of durations, in exponentially-sized buckets.
+    """
+
+    total = 0.0
+    count = 0
+
+    def __init__(self):
+        self.counts = [0] * (BUCKETS + 1)
+
+    def observe(self, seconds):
+        self.counts[bucketFor(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def bounds(self):
+        """
+        The upper bound of each bucket, in seconds, except for the last
+        bucket, which has no bound.
+        """
+
+        return [(1 << i) / 1000000 for i in range(BUCKETS)]
+
+    def copy(self):
+        rv = Histogram()
+        rv.counts = self.counts[:]
+        rv.count = self.count
+        rv.total = self.total
+        return rv
+
+    def time(self):
+        return HistogramContext(self)
+
+
+class HistogramContext(object):
+
+    startTime = 0.0
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.startTime = latencies.now()
+
+    def __exit__(self, *unused):
+        if latencies.enabled and self.startTime:
+            self.histogram.observe(monotonic() - self.startTime)
+
+
 def scriptCountCmp(left, right):
     return left[1] > right[1]
 
@@ -61,14 +181,15 @@ class Recorder(object):
     def __init__(self):
         self.timings = {}
         self.rates = {}
+        self.histograms = {}
         self.scripts = {}
         self.contextStack = []
 
     def start(self):
-        self.startTime = clock()
+        self.startTime = monotonic()
 
     def stop(self):
-        self.endTime = clock()
+        self.endTime = monotonic()
 
     def addTiming(self, label, elapsed):
         if label not in self.timings:
@@ -76,10 +197,10 @@ class Recorder(object):
         self.timings[label] += elapsed
 
     def startSegment(self):
-        self.currentSegment = clock()
+        self.currentSegment = monotonic()
 
     def finishSegment(self):
-        elapsed = clock() - self.currentSegment
+        elapsed = monotonic() - self.currentSegment
         self.addTiming(self.contextStack[-1], elapsed)
 
     def pushContext(self, label):
@@ -99,6 +220,11 @@ class Recorder(object):
             self.rates[label] = RecorderRate()
         return self.rates[label]
 
+    def getHistogramFor(self, label):
+        if label not in self.histograms:
+            self.histograms[label] = Histogram()
+        return self.histograms[label]
+
     def makeInstanceOf(self, label):
         if label in self.scripts:
             self.scripts[label] += 1
@@ -111,7 +237,7 @@ class Recorder(object):
         return items[:10]
 
     def getTimings(self):
-        total = clock() - self.startTime
+        total = monotonic() - self.startTime
         rv = {}
         unaccounted = 1.0
         for label, timing in self.timings.items():
@@ -141,6 +267,125 @@ class Recorder(object):
         return RecorderContext(self, label)
 
 
+def jsonHistogram(histogram):
+    buckets = []
+    for i, bound in enumerate(histogram.bounds()):
+        buckets.append("[%f, %d]" % (bound, histogram.counts[i]))
+    buckets.append('["+Inf", %d]' % histogram.counts[BUCKETS])
+    return '{"count": %d, "sum": %f, "buckets": [%s]}' % (
+        histogram.count, histogram.total, ", ".join(buckets))
+
+
+def jsonString(s):
+    """
+    Quote a string for JSON, escaping everything that JSON won't allow raw.
+    """
+
+    pieces = ['"']
+    for c in s:
+        if c == '"':
+            pieces.append('\\"')
+        elif c == "\\":
+            pieces.append("\\\\")
+        elif ord(c) < 0x20:
+            pieces.append("\\u%04x" % ord(c))
+        else:
+            pieces.append(c)
+    pieces.append('"')
+    return "".join(pieces)
+
+
+def jsonHistograms(histograms):
+    pieces = []
+    for label, histogram in histograms.items():
+        pieces.append("%s: %s" % (jsonString(label), jsonHistogram(histogram)))
+    return "{%s}" % ", ".join(pieces)
+
+
+def jsonGauges(gauges):
+    pieces = []
+    for label, value in gauges.items():
+        pieces.append("%s: %d" % (jsonString(label), value))
+    return "{%s}" % ", ".join(pieces)
+
+
+def dumpJSON(histograms, vats):
+    """
+    Render global histograms and per-vat histograms and gauges as JSON.
+
+    `histograms` maps labels to histograms, and `vats` is a list of triples
+    of vat names, such maps, and maps from labels to gauge readings.
+    """
+
+    vatPieces = []
+    for name, vatHistograms, gauges in vats:
+        vatPieces.append('%s: {"histograms": %s, "gauges": %s}' % (
+            jsonString(name), jsonHistograms(vatHistograms),
+            jsonGauges(gauges)))
+    return '{"histograms": %s, "vats": {%s}}' % (jsonHistograms(histograms),
+                                                ", ".join(vatPieces))
+
+
+def prometheusName(label, unit):
+    chars = []
+    for c in label:
+        chars.append(c if c.isalnum() else "_")
+    name = "typhon_" + "".join(chars)
+    return name + "_" + unit if unit else name
+
+
+def prometheusHistogram(name, labels, histogram):
+    lines = []
+    cumulative = 0
+    for i, bound in enumerate(histogram.bounds()):
+        cumulative += histogram.counts[i]
+        lines.append('%s_bucket{%sle="%f"} %d' % (name, labels, bound,
+                                                   cumulative))
+    cumulative += histogram.counts[BUCKETS]
+    lines.append('%s_bucket{%sle="+Inf"} %d' % (name, labels, cumulative))
+    # The labels for the bare series don't need a trailing comma.
+    bare = "{%s}" % labels[:-1] if labels else ""
+    lines.append("%s_sum%s %f" % (name, bare, histogram.total))
+    lines.append("%s_count%s %d" % (name, bare, histogram.count))
+    return lines
+
+
+def dumpPrometheus(histograms, vats):
+    """
+    Render global histograms and per-vat histograms and gauges in the
+    Prometheus text format.
+
+    Per-vat series are labeled with their vat's name.
+    """
+
+    series = {}
+    gaugeSeries = {}
+    for label, histogram in histograms.items():
+        name = prometheusName(label, "seconds")
+        series[name] = prometheusHistogram(name, "", histogram)
+    for vatName, vatHistograms, gauges in vats:
+        labels = 'vat=%s,' % jsonString(vatName)
+        for label, histogram in vatHistograms.items():
+            name = prometheusName(label, "seconds")
+            if name not in series:
+                series[name] = []
+            series[name].extend(prometheusHistogram(name, labels, histogram))
+        for label, value in gauges.items():
+            name = prometheusName(label, "")
+            if name not in gaugeSeries:
+                gaugeSeries[name] = []
+            gaugeSeries[name].append("%s{%s} %d" % (name, labels[:-1], value))
+    lines = []
+    for name, body in series.items():
+        lines.append("# TYPE %s histogram" % name)
+        lines.extend(body)
+    for name, body in gaugeSeries.items():
+        lines.append("# TYPE %s gauge" % name)
+        lines.extend(body)
+    lines.append("")
+    return "\n".join(lines)
+
+
 _recorder = Recorder()
 def globalRecorder():
     return _recorder
@@ -6,8 +6,48 @@ from typhon.nano.scopes import SCOPE_LOCAL, BoundNounsIR
 
 def elideEscapes(ast):
     ast = ElideMethodReturn().visitExpr(ast)
+    ast = LocalizeEscapes().visitExpr(ast)
     return ast
 
+# XXX common code with t.n.auditors
+def unwrappingGet(ir, expr):
+    if (isinstance(expr, ir.CallExpr) and
+            expr.verb == u"get" and
+            len(expr.args) == len(expr.namedArgs) == 0):
+        # Looks like a slot/binding .get/0 to me!
+        return expr.obj
+    return expr
+
+def ejectedBy(ir, expr, index, depth):
+    """
+    Whether `expr` is a call of the form `ej.run()` or `ej.run(value)`,
+    where `ej` is the local at `index`.
+
+    `depth` is how many times the local must be unwrapped with .get/0 to
+    reach the ejector: none for nouns, once for slots, twice for bindings.
+    """
+
+    if not (isinstance(expr, ir.CallExpr) and expr.verb == u"run" and
+            len(expr.args) <= 1 and len(expr.namedArgs) == 0):
+        return False
+    obj = expr.obj
+    for _ in range(depth):
+        inner = unwrappingGet(ir, obj)
+        if inner is obj:
+            return False
+        obj = inner
+    return isinstance(obj, ir.LocalExpr) and obj.index == index
+
+def closesOver(layout, index):
+    """
+    Whether an object with this layout captures the local at `index`.
+    """
+
+    for name, (position, scope, i, severity) in layout.frameNames.items():
+        if scope is SCOPE_LOCAL and i == index:
+            return True
+    return False
+
 class FindUsage(BoundNounsIR.selfPass()):
 
     found = False
@@ -22,11 +62,8 @@ class FindUsage(BoundNounsIR.selfPass()):
 
     def visitObjectExpr(self, doc, patt, auditors, methods, matchers, mast,
                         layout, span):
-        frameNames = layout.frameNames
-        for name, (position, scope, index, severity) in frameNames.items():
-            if scope is SCOPE_LOCAL and index == self.index:
-                self.found = True
-                break
+        if closesOver(layout, self.index):
+            self.found = True
         return self.dest.ObjectExpr(doc, patt, auditors, methods, matchers,
                                     mast, layout, span)
 
@@ -42,14 +79,8 @@ class ElideMethodReturn(BoundNounsIR.selfPass()):
         else:
             return -1
 
-    # XXX common code with t.n.auditors
     def unwrappingGet(self, expr):
-        if (isinstance(expr, self.dest.CallExpr) and
-                expr.verb == u"get" and
-                len(expr.args) == len(expr.namedArgs) == 0):
-            # Looks like a slot/binding .get/0 to me!
-            return expr.obj
-        return expr
+        return unwrappingGet(self.dest, expr)
 
     def visitEscapeOnlyExpr(self, patt, body, span):
         patt = self.visitPatt(patt)
@@ -85,3 +116,122 @@ class ElideMethodReturn(BoundNounsIR.selfPass()):
                             else:
                                 return seq
         return self.dest.EscapeOnlyExpr(patt, body, span)
+
+
+class CountEjections(BoundNounsIR.selfPass()):
+    """
+    Count the uses of a local, and how many of those uses only fire it.
+
+    Objects aren't searched; an object which closes over the local is
+    presumed to let it escape.
+    """
+
+    captured = False
+    uses = 0
+    ejections = 0
+
+    def __init__(self, index, depth):
+        self.index = index
+        self.depth = depth
+
+    def visitLocalExpr(self, name, index, span):
+        if index == self.index:
+            self.uses += 1
+        return self.dest.LocalExpr(name, index, span)
+
+    def visitCallExpr(self, obj, verb, args, namedArgs, span):
+        call = self.dest.CallExpr(obj, verb, args, namedArgs, span)
+        if ejectedBy(self.dest, call, self.index, self.depth):
+            self.ejections += 1
+        return self.super.visitCallExpr(self, obj, verb, args, namedArgs,
+                                        span)
+
+    def visitObjectExpr(self, doc, patt, auditors, methods, matchers, mast,
+                        layout, span):
+        if closesOver(layout, self.index):
+            self.captured = True
+        return self.dest.ObjectExpr(doc, patt, auditors, methods, matchers,
+                                    mast, layout, span)
+
+    def isLocal(self):
+        # Every use must be a firing, and no object may close over it.
+        return self.uses == self.ejections and not self.captured
+
+class LowerEjections(BoundNounsIR.selfPass()):
+    """
+    Replace firings of a local ejector with direct ejections.
+    """
+
+    def __init__(self, name, index, depth):
+        self.name = name
+        self.index = index
+        self.depth = depth
+
+    def visitCallExpr(self, obj, verb, args, namedArgs, span):
+        call = self.dest.CallExpr(obj, verb, args, namedArgs, span)
+        if ejectedBy(self.dest, call, self.index, self.depth):
+            if args:
+                value = self.visitExpr(args[0])
+            else:
+                value = self.dest.NullExpr(span)
+            return self.dest.LocalEjectExpr(self.name, self.index, value,
+                                            span)
+        return self.super.visitCallExpr(self, obj, verb, args, namedArgs,
+                                        span)
+
+class LocalizeEscapes(BoundNounsIR.selfPass()):
+    """
+    Lower escape-exprs whose ejectors can't leave their bodies.
+
+    An ejector which is only ever fired directly, and which is neither
+    passed to anything nor closed over by any object, can only be fired from
+    within its own escape-expr, in the same frame. Such an ejector needn't
+    exist at all; the escape can catch its ejections directly, without
+    allocating an ejector.
+    """
+
+    def localize(self, patt, body):
+        """
+        The name and index of the ejector, and the lowered body; or None if
+        the ejector could escape.
+        """
+
+        # Only unguarded final patterns; a guard could observe the ejector.
+        if isinstance(patt, self.dest.NounPatt):
+            name, guard, index, depth = patt.name, patt.guard, patt.index, 0
+        elif isinstance(patt, self.dest.FinalSlotPatt):
+            name, guard, index, depth = patt.name, patt.guard, patt.index, 1
+        elif isinstance(patt, self.dest.FinalBindingPatt):
+            name, guard, index, depth = patt.name, patt.guard, patt.index, 2
+        else:
+            return None
+        if not isinstance(guard, self.dest.NullExpr):
+            return None
+        counter = CountEjections(index, depth)
+        counter.visitExpr(body)
+        if not counter.isLocal():
+            return None
+        lowered = LowerEjections(name, index, depth).visitExpr(body)
+        return name, index, lowered
+
+    def visitEscapeOnlyExpr(self, patt, body, span):
+        patt = self.visitPatt(patt)
+        body = self.visitExpr(body)
+        localized = self.localize(patt, body)
+        if localized is None:
+            return self.dest.EscapeOnlyExpr(patt, body, span)
+        name, index, lowered = localized
+        return self.dest.LocalEscapeOnlyExpr(name, index, lowered, span)
+
+    def visitEscapeExpr(self, patt, body, catchPatt, catchBody, span):
+        patt = self.visitPatt(patt)
+        body = self.visitExpr(body)
+        catchPatt = self.visitPatt(catchPatt)
+        catchBody = self.visitExpr(catchBody)
+        localized = self.localize(patt, body)
+        if localized is None:
+            return self.dest.EscapeExpr(patt, body, catchPatt, catchBody,
+                                        span)
+        name, index, lowered = localized
+        return self.dest.LocalEscapeExpr(name, index, lowered, catchPatt,
+                                         catchBody, span)
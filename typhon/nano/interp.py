@@ -3,10 +3,11 @@ A simple AST interpreter.
 """
 
 from rpython.rlib import rvmprof
-from rpython.rlib.jit import promote, unroll_safe, we_are_jitted
+from rpython.rlib.jit import elidable, promote, unroll_safe, we_are_jitted
 
 from typhon.atoms import getAtom
 from typhon.errors import Ejecting, Refused, UserException, userError
+from typhon.metrics import globalRecorder, hotRates
 from typhon.nano.main import mainPipeline
 from typhon.nano.mix import StampedScriptIR, mix
 from typhon.nano.scopes import (SCOPE_FRAME, SCOPE_LOCAL,
@@ -16,8 +17,8 @@ from typhon.objects.auditors import (SealedPortrayal, selfless,
 from typhon.objects.constants import NullObject
 from typhon.objects.collections.helpers import emptySet
 from typhon.objects.collections.lists import unwrapList, wrapList
-from typhon.objects.collections.maps import (ConstMap, EMPTY_MAP, monteMap,
-                                             unwrapMap)
+from typhon.objects.collections.maps import (ConstMap, EMPTY_MAP, FAIL_KEY,
+                                             monteMap, unwrapMap)
 from typhon.objects.constants import unwrapBool
 from typhon.objects.data import StrObject, unwrapStr
 from typhon.objects.ejectors import Ejector, theThrower, throw
@@ -28,6 +29,7 @@ from typhon.objects.root import Object
 from typhon.objects.slots import (Binding, FinalSlot, VarSlot, finalBinding,
                                   varBinding)
 from typhon.profile import profileTyphon
+from typhon.tracing import currentVatName, tracer
 
 RUN_2 = getAtom(u"run", 2)
 _UNCALL_0 = getAtom(u"_uncall", 0)
@@ -38,6 +40,12 @@ NULL_BINDING = finalBinding(NullObject, anyGuard)
 ProfileNameIR = StampedScriptIR.extend("ProfileName",
     ["ProfileName"],
     {
+        "Script": {
+            "ScriptExpr": [("name", None), ("doc", None), ("mast", None),
+                           ("layout", None), ("stamps", "Object*"),
+                           ("methods", "Method*"),
+                           ("matchers", "Matcher*"), ("methodTable", None)],
+        },
         "Method": {
             "MethodExpr": [("profileName", "ProfileName"), ("doc", None),
                            ("atom", None), ("patts", "Patt*"),
@@ -83,6 +91,21 @@ class MakeProfileNames(StampedScriptIR.makePassTo(ProfileNameIR)):
         self.objectNames.pop()
         return rv
 
+    def visitScriptExpr(self, name, doc, mast, layout, stamps, methods,
+                        matchers, span):
+        stamps = [self.visitObject(stamp) for stamp in stamps]
+        methods = [self.visitMethod(method) for method in methods]
+        matchers = [self.visitMatcher(matcher) for matcher in matchers]
+        # Build the dispatch table once, here, rather than scanning the
+        # methods on every call.
+        methodTable = {}
+        for method in methods:
+            assert isinstance(method, self.dest.MethodExpr), "squash"
+            if method.atom not in methodTable:
+                methodTable[method.atom] = method
+        return self.dest.ScriptExpr(name, doc, mast, layout, stamps, methods,
+                                    matchers, methodTable, span)
+
     def makeProfileName(self, inner):
         name, fqn = self.objectNames[-1]
         return "mt:%s.%s:1:%s" % (name, inner, fqn)
@@ -117,6 +140,25 @@ rvmprof.register_code_object_class(ProfileNameIR.MatcherExpr,
         lambda matcher: matcher.profileName)
 
 
+# How many calls are answered by a declared method; the rest fall through to
+# Miranda methods or matchers. The table itself can't miss.
+declaredMethodRate = globalRecorder().getRateFor(
+    "InterpObject calls to declared methods")
+compileHistogram = globalRecorder().getHistogramFor("nanopass compile")
+
+
+@elidable
+def lookupMethod(script, atom):
+    """
+    Find the method on a script which responds to an atom, or None.
+
+    Scripts and their method tables are immutable, so this is elidable; when
+    both the script and the atom are promoted, the JIT folds it away.
+    """
+
+    return script.methodTable.get(atom, None)
+
+
 class InterpObject(Object):
     """
     An object whose script is executed by the AST evaluator.
@@ -124,12 +166,12 @@ class InterpObject(Object):
 
     _immutable_fields_ = "frame[*]", "script", "report"
 
-    # Inline single-entry method cache.
-    cachedMethod = None, None
-
     # Auditor report.
     report = None
 
+    # Whether this (semi)transparent object is known to be settled.
+    _isSettled = False
+
     def __init__(self, script, frame):
         self.script = script
         self.frame = frame
@@ -165,22 +207,11 @@ class InterpObject(Object):
         # super().
         return Object.auditedBy(self, prospect)
 
-    @unroll_safe
     def getMethod(self, atom):
-        # If we are JIT'd, then don't bother with the method cache. It will
-        # only slow things down. Instead, head directly to the script and find
-        # the right method.
-        if we_are_jitted():
-            for method in promote(self.script).methods:
-                if method.atom is atom:
-                    return promote(method)
-        else:
-            if self.cachedMethod[0] is atom:
-                return self.cachedMethod[1]
-            for method in self.script.methods:
-                if method.atom is atom:
-                    self.cachedMethod = atom, method
-                    return method
+        method = lookupMethod(promote(self.script), promote(atom))
+        if hotRates.enabled and not we_are_jitted():
+            declaredMethodRate.observe(method is not None)
+        return method
 
     def respondingAtoms(self):
         d = {}
@@ -188,17 +219,28 @@ class InterpObject(Object):
             d[method.atom] = method.doc
         return d
 
-    # Two loops, both of which loop over greens. ~ C.
-    # @rvmprof.vmprof_execute_code("method",
-    #         lambda self, method, args, namedArgs: method,
-    #         result_class=Object)
-    @unroll_safe
+    @rvmprof.vmprof_execute_code("method",
+            lambda self, method, args, namedArgs: method)
     def runMethod(self, method, args, namedArgs):
-        e = Evaluator(self.frame, method.localSize)
         if len(args) != len(method.patts):
             raise userError(u"Method '%s.%s' expected %d args, got %d" % (
                 self.getDisplayName(), method.atom.verb, len(method.patts),
                 len(args)))
+        if we_are_jitted():
+            # Traces make a fresh evaluator virtual, which is cheaper than
+            # writing to the shared one.
+            e = Evaluator(self.frame, method.localSize)
+            return self.runMethodIn(e, method, args, namedArgs)
+        e = theEvaluator
+        activation = e.enter(self.frame, method.localSize)
+        try:
+            return self.runMethodIn(e, method, args, namedArgs)
+        finally:
+            e.leave(activation)
+
+    # Two loops, both of which loop over greens. ~ C.
+    @unroll_safe
+    def runMethodIn(self, e, method, args, namedArgs):
         for i in range(len(method.patts)):
             e.matchBind(method.patts[i], args[i])
         namedArgDict = unwrapMap(namedArgs)
@@ -219,13 +261,20 @@ class InterpObject(Object):
             return v
         return e.runGuard(resultGuard, v, None)
 
-    # @rvmprof.vmprof_execute_code("matcher",
-    #         lambda self, matcher, message, ej: matcher,
-    #         result_class=Object)
+    @rvmprof.vmprof_execute_code("matcher",
+            lambda self, matcher, message, ej: matcher)
     def runMatcher(self, matcher, message, ej):
-        e = Evaluator(self.frame, matcher.localSize)
-        e.matchBind(matcher.patt, message, ej)
-        return e.visitExpr(matcher.body)
+        if we_are_jitted():
+            e = Evaluator(self.frame, matcher.localSize)
+            e.matchBind(matcher.patt, message, ej)
+            return e.visitExpr(matcher.body)
+        e = theEvaluator
+        activation = e.enter(self.frame, matcher.localSize)
+        try:
+            e.matchBind(matcher.patt, message, ej)
+            return e.visitExpr(matcher.body)
+        finally:
+            e.leave(activation)
 
     def toString(self):
         # Easily the worst part of the entire stringifying experience. We must
@@ -254,11 +303,15 @@ class InterpObject(Object):
             return self.report.getStamps()
 
     def isSettled(self, sofar=None):
+        if self._isSettled:
+            return True
         if selfless in self.auditorStamps():
             if (transparentStamp in self.auditorStamps()
                 or semitransparentStamp in self.auditorStamps()):
                 from typhon.objects.collections.maps import EMPTY_MAP
-                if sofar is None:
+                # Same caching discipline as ConstList.isSettled/1.
+                toplevel = sofar is None
+                if toplevel:
                     sofar = {self: None}
                 # Uncall and recurse.
                 portrayal = self.callAtom(_UNCALL_0, [],
@@ -267,7 +320,10 @@ class InterpObject(Object):
                     if not isinstance(portrayal, SealedPortrayal):
                         userError(u'Semitransparent portrayal is not a SealedPortrayal!')
                     portrayal = portrayal.portrayal
-                return portrayal.isSettled(sofar=sofar)
+                settled = portrayal.isSettled(sofar=sofar)
+                if settled and toplevel:
+                    self._isSettled = True
+                return settled
 
         # Well, we're resolved, so I guess that we're good!
         return True
@@ -368,6 +424,9 @@ class GuardInfo(object):
         # self.fastGuardRate.no()
         return self.guardLookup.lookupGuard(name, self.frameTable)
 
+    def hasDynamicGuards(self):
+        return bool(self.frameTable.dynamicGuards)
+
     def dynamicGuards(self):
         names = self.frameTable.dynamicGuards.keys()
         return [self.guardLookup.lookupGuard(name, self.frameTable)
@@ -385,14 +444,43 @@ class _AnyGuardLookup(GuardLookup):
 anyGuardLookup = _AnyGuardLookup()
 
 class EvaluatorGuardLookup(GuardLookup):
+    """
+    Look up guards in one activation's locals and frame.
 
-    def __init__(self, evaluator):
-        self.evaluator = evaluator
+    The evaluator is shared between activations, so this holds onto the
+    activation itself rather than the evaluator.
+    """
+
+    def __init__(self, locals, frame):
+        self.locals = locals
+        self.frame = frame
 
     def lookupGuard(self, name, frameTable):
         index = frameTable.dynamicGuards[name]
         _, scope, idx, severity = frameTable.frameInfo[index]
-        return retrieveGuard(severity, self.evaluator.lookupBinding(scope, idx))
+        binding = lookupBinding(self.locals, self.frame, scope, idx)
+        return retrieveGuard(severity, binding)
+
+
+def lookupBinding(locals, frame, scope, idx):
+    if scope is SCOPE_LOCAL:
+        return locals[idx]
+    elif scope is SCOPE_FRAME:
+        return frame[idx]
+    else:
+        assert False, "teacher"
+
+
+class LocalEjecting(Exception):
+    """
+    A local ejector was fired.
+
+    The ejector was never allocated, so its slot in the frame's locals is
+    free; the ejected value waits there, and the slots of escapes which
+    weren't fired hold None. Only the prebuilt instance is ever raised.
+    """
+
+localEjecting = LocalEjecting()
 
 
 class Evaluator(ProfileNameIR.makePassTo(None)):
@@ -403,7 +491,19 @@ class Evaluator(ProfileNameIR.makePassTo(None)):
         self.specimen = None
         self.patternFailure = None
 
-        self.guardLookup = EvaluatorGuardLookup(self)
+    def enter(self, frame, localSize):
+        """
+        Start a new activation with its own locals, returning the current
+        activation so that it may be given back to leave().
+        """
+
+        activation = self.locals, self.frame
+        self.locals = [NULL_BINDING] * localSize
+        self.frame = frame
+        return activation
+
+    def leave(self, activation):
+        self.locals, self.frame = activation
 
     def matchBind(self, patt, val, ej=theThrower):
         oldSpecimen = self.specimen
@@ -451,6 +551,10 @@ class Evaluator(ProfileNameIR.makePassTo(None)):
             for na in namedArgs:
                 (k, v) = self.visitNamedArg(na)
                 d[k] = v
+            # Attach the Miranda FAIL now, while the map is still ours to
+            # mutate, so that callAtom() doesn't have to copy it.
+            if FAIL_KEY not in d:
+                d[FAIL_KEY] = theThrower
             namedArgMap = ConstMap(d)
         else:
             namedArgMap = EMPTY_MAP
@@ -488,6 +592,47 @@ class Evaluator(ProfileNameIR.makePassTo(None)):
                 self.matchBind(catchPatt, e.value)
                 return self.visitExpr(catchBody)
 
+    def takeEjected(self, index):
+        """
+        Take the value ejected to the escape at `index`, or None if that
+        escape wasn't the one fired.
+        """
+
+        value = self.locals[index]
+        self.locals[index] = None
+        return value
+
+    def visitLocalEscapeOnlyExpr(self, name, index, body, span):
+        # jit_debug("LocalEscapeOnlyExpr")
+        self.locals[index] = None
+        try:
+            return self.visitExpr(body)
+        except LocalEjecting:
+            value = self.takeEjected(index)
+            if value is None:
+                raise
+            return value
+
+    def visitLocalEscapeExpr(self, name, index, body, catchPatt, catchBody,
+                             span):
+        # jit_debug("LocalEscapeExpr")
+        self.locals[index] = None
+        try:
+            return self.visitExpr(body)
+        except LocalEjecting:
+            value = self.takeEjected(index)
+            if value is None:
+                raise
+            self.matchBind(catchPatt, value)
+            return self.visitExpr(catchBody)
+
+    def visitLocalEjectExpr(self, name, index, value, span):
+        # jit_debug("LocalEjectExpr")
+        # Each escape has its own slot, so a finally block which ejects to
+        # another escape while this ejection unwinds doesn't clobber it.
+        self.locals[index] = self.visitExpr(value)
+        raise localEjecting
+
     def visitFinallyExpr(self, body, atLast, span):
         # jit_debug("FinallyExpr")
         try:
@@ -512,12 +657,7 @@ class Evaluator(ProfileNameIR.makePassTo(None)):
         return anyGuard
 
     def lookupBinding(self, scope, idx):
-        if scope is SCOPE_LOCAL:
-            return self.locals[idx]
-        elif scope is SCOPE_FRAME:
-            return self.frame[idx]
-        else:
-            assert False, "teacher"
+        return lookupBinding(self.locals, self.frame, scope, idx)
 
     # Everything passed to this method, except self, is immutable. ~ C.
     @unroll_safe
@@ -590,7 +730,7 @@ class Evaluator(ProfileNameIR.makePassTo(None)):
                  in frameTable.frameInfo]
         # Set up guard information.
         guardInfo = GuardInfo(guards, frameTable, script.name, guardAuditor,
-                self.guardLookup)
+                EvaluatorGuardLookup(self.locals, self.frame))
 
         assert len(script.layout.frameNames) == len(frame), "shortcoming"
 
@@ -725,6 +865,11 @@ class Evaluator(ProfileNameIR.makePassTo(None)):
         return (self.visitExpr(key), self.visitExpr(value))
 
 
+# Interpreted method calls share this evaluator, entering and leaving an
+# activation for each call, rather than allocating their own.
+theEvaluator = Evaluator([], 0)
+
+
 def scope2env(scope):
     environment = {}
     for k, v in scope.items():
@@ -748,15 +893,50 @@ def env2scope(outerNames, env):
     return scope
 
 
+def compileMonte(expr, environment, fqnPrefix, inRepl):
+    """
+    Run the main nanopass pipeline.
+
+    The result depends only upon the names in `environment` and not upon
+    their values, so it may be reused with any environment which has the
+    same names.
+    """
+
+    start = tracer.begin()
+    with compileHistogram.time():
+        rv = mainPipeline(expr, environment.keys(), fqnPrefix, inRepl)
+    if tracer.enabled:
+        tracer.record("compile", "nanopass", currentVatName(), fqnPrefix,
+                      start)
+    return rv
+
+
 def evalMonte(expr, environment, fqnPrefix, inRepl):
-    # Run the main nanopass pipeline.
-    ast, outerNames, topLocalNames, localSize = mainPipeline(expr,
-            environment.keys(), fqnPrefix, inRepl)
+    return evalCompiled(compileMonte(expr, environment, fqnPrefix, inRepl),
+                        environment)
+
+
+def evalCompiled(compiled, environment):
+    ast, outerNames, topLocalNames, localSize = compiled
+    ast = mixCompiled(ast, env2scope(outerNames, environment))
+    return evalMixed(ast, topLocalNames, localSize)
 
-    outers = env2scope(outerNames, environment)
+
+def mixCompiled(ast, outers):
+    """
+    Mix compiled code with the values of its outer names.
+
+    The result may be evaluated any number of times.
+    """
+
+    start = tracer.begin()
     ast = mix(ast, outers)
-    ast = MakeProfileNames().visitExpr(ast)
-    result = NullObject
+    if tracer.enabled:
+        tracer.record("mix", "nanopass", currentVatName(), u"", start)
+    return MakeProfileNames().visitExpr(ast)
+
+
+def evalMixed(ast, topLocalNames, localSize):
     e = Evaluator([], localSize)
     result = e.visitExpr(ast)
     topLocals = []
@@ -773,9 +953,13 @@ def evalMonte(expr, environment, fqnPrefix, inRepl):
 def evalToPair(expr, scopeMap, filename, inRepl=False):
     scope = unwrapMap(scopeMap)
     result, topLocals = evalMonte(expr, scope2env(scope), filename, inRepl)
+    return result, extendScope(scope, topLocals)
+
+
+def extendScope(scope, topLocals):
     d = scope.copy()
     # XXX Future versions may choose to keep old env structures so that
     # debuggers can rewind and inspect bindings in old REPL lines.
     for name, val in topLocals:
         d[StrObject(u"&&" + name)] = val
-    return result, ConstMap(d)
+    return ConstMap(d)
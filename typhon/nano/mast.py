@@ -485,10 +485,10 @@ def paramCheck(pname, typ, name):
         return """
   if not isinstance (%s, ConstList):
    raise userError(u'Expected "%s" to be a list of %s')
-  for item in %s.objs:
+  for item in %s.getObjs():
    if not (isinstance(item, ASTWrapper.%s) or item is NullObject):
     raise userError(u'Expected "%s" a list of %s')
-  %s_0 = [MastIR.NullExpr(None) if it is NullObject else it._ast for it in %s.objs]
+  %s_0 = [MastIR.NullExpr(None) if it is NullObject else it._ast for it in %s.getObjs()]
 """ % (pname, pname, typ, pname, typ, pname, typ, pname, pname)
     else:
         return """
@@ -539,6 +539,15 @@ BoundNounsIR = ReifyMetaContextIR.extend(
             "LocalExpr": [("name", "Noun"), ("index", None)],
             "FrameExpr": [("name", "Noun"), ("index", None)],
             "OuterExpr": [("name", "Noun"), ("index", None)],
+            # Escapes whose ejectors never leave their bodies; see
+            # t.n.escapes.
+            "LocalEscapeOnlyExpr": [("name", "Noun"), ("index", None),
+                                    ("body", "Expr")],
+            "LocalEscapeExpr": [("name", "Noun"), ("index", None),
+                                ("body", "Expr"), ("catchPatt", "Patt"),
+                                ("catchBody", "Expr")],
+            "LocalEjectExpr": [("name", "Noun"), ("index", None),
+                               ("value", "Expr")],
         },
         "Patt": {
             "-TempPatt": None,
@@ -213,6 +213,30 @@ class PrettySpecialNouns(AtomIR.makePassTo(None)):
         with self.braces():
             self.visitExpr(catchBody)
 
+    def visitLocalEscapeOnlyExpr(self, name, index, body, span):
+        self.write(u"escape ")
+        self.write(name)
+        self.write(u"⒧")
+        self.write(asIndex(index))
+        with self.braces():
+            self.visitExpr(body)
+
+    def visitLocalEscapeExpr(self, name, index, body, catchPatt, catchBody,
+                             span):
+        self.visitLocalEscapeOnlyExpr(name, index, body, span)
+        self.write(u" catch ")
+        self.visitPatt(catchPatt)
+        with self.braces():
+            self.visitExpr(catchBody)
+
+    def visitLocalEjectExpr(self, name, index, value, span):
+        self.write(name)
+        self.write(u"⒧")
+        self.write(asIndex(index))
+        self.write(u"(")
+        self.visitExpr(value)
+        self.write(u")")
+
     def visitFinallyExpr(self, body, atLast, span):
         self.write(u"try")
         with self.braces():
@@ -38,13 +38,31 @@ def resolveKey(key):
 
     return key
 
+# Most keys are plain Ints, Strs, and Bytes. They are never promises, so they
+# don't need resolving, and their sameness is just equality of their
+# contents. Other keys, including an Int compared with a BigInt, go the long
+# way around.
+
 def keyEq(first, second):
+    from typhon.objects.data import BytesObject, IntObject, StrObject
+    if isinstance(first, StrObject) and isinstance(second, StrObject):
+        return first.getString() == second.getString()
+    if isinstance(first, IntObject) and isinstance(second, IntObject):
+        return first.getInt() == second.getInt()
+    if isinstance(first, BytesObject) and isinstance(second, BytesObject):
+        return first.getBytes() == second.getBytes()
+
     from typhon.objects.equality import isSameEver
     first = resolveKey(first)
     second = resolveKey(second)
     return isSameEver(first, second)
 
 def keyHash(key):
+    from typhon.objects.data import BytesObject, IntObject, StrObject
+    if isinstance(key, IntObject):
+        return key.computeHash(0)
+    if isinstance(key, StrObject) or isinstance(key, BytesObject):
+        return key.samenessHash()
     return resolveKey(key).samenessHash()
 
 def monteMap():
@@ -425,7 +425,7 @@ def unwrapList(o, ej=None):
     from typhon.objects.refs import resolution
     l = resolution(o)
     if isinstance(l, ConstList):
-        return l.objs
+        return l.getObjs()
     if isinstance(l, FlexList):
         return l.snapshot()
     throwStr(ej, u"Specimen is not List: " + l.toString())
@@ -459,12 +459,48 @@ class ConstList(Object):
     A list of objects.
     """
 
-    _immutable_fields_ = "objs[*]",
+    _immutable_fields_ = "objs?[*]",
 
     _isSettled = False
 
+    # When objs is None, this list is _parent followed by _tail. Appending
+    # only records the new tail; the elements are copied into a single list
+    # once somebody needs them all, so building a list with repeated with/1
+    # is linear rather than quadratic.
+    _parent = None
+    _tail = None
+
     def __init__(self, objs):
         self.objs = objs
+        self._size = len(objs)
+
+    def extend(self, tail):
+        l = ConstList([])
+        l.objs = None
+        l._size = self._size + len(tail)
+        l._parent = self
+        l._tail = tail
+        return l
+
+    def getObjs(self):
+        if self.objs is None:
+            self.materialize()
+        return self.objs
+
+    def materialize(self):
+        tails = []
+        base = self
+        while base.objs is None:
+            tails.append(base._tail)
+            base = base._parent
+        objs = base.objs[:]
+        # Tails were collected newest first.
+        i = len(tails)
+        while i > 0:
+            i -= 1
+            objs.extend(tails[i])
+        self.objs = objs
+        self._parent = self._tail = None
 
     # Do some voodoo for pretty-printing. Cargo-culted voodoo. ~ C.
 
@@ -477,9 +513,9 @@ class ConstList(Object):
     @method("Void", "Any")
     def _printOn(self, printer):
         printer.call(u"print", [StrObject(u"[")])
-        for i, obj in enumerate(self.objs):
+        for i, obj in enumerate(self.getObjs()):
             printer.call(u"quote", [obj])
-            if i + 1 < len(self.objs):
+            if i + 1 < self._size:
                 printer.call(u"print", [StrObject(u", ")])
         printer.call(u"print", [StrObject(u"]")])
 
@@ -493,33 +529,48 @@ class ConstList(Object):
             return True
 
         # No cache; do this the hard way.
-        if sofar is None:
+        # Only a walk which started here has seen everything reachable from
+        # this list; a nested walk assumed that its callers were settled.
+        toplevel = sofar is None
+        if toplevel:
             sofar = {self: None}
-        for v in self.objs:
-            if v not in sofar and not v.isSettled(sofar=sofar):
-                return False
+        # Nested lists are walked with an explicit stack, so that deeply
+        # nested lists can't overflow the stack.
+        stack = [self]
+        while stack:
+            l = stack.pop()
+            for v in l.getObjs():
+                if v in sofar:
+                    continue
+                if isinstance(v, ConstList):
+                    if not v._isSettled:
+                        sofar[v] = None
+                        stack.append(v)
+                elif not v.isSettled(sofar=sofar):
+                    return False
 
         # Cache this success; we can't become unsettled.
-        self._isSettled = True
+        if toplevel:
+            self._isSettled = True
         return True
 
     @method("Bool")
     def empty(self):
-        return bool(self.objs)
+        return bool(self._size)
 
-    @method("List", "List")
+    @method("Any", "List")
     @profileTyphon("List.add/1")
     def add(self, other):
         if other:
-            return self.objs + other
+            return self.extend(other)
         else:
-            return self.objs
+            return self
 
     @method("List", "List")
     @profileTyphon("List.join/1")
     def join(self, pieces):
         l = []
-        filler = self.objs
+        filler = self.getObjs()
         first = True
         for piece in pieces:
             # For all iterations except the first, append a copy of
@@ -536,12 +587,12 @@ class ConstList(Object):
     def diverge(self):
         "A mutable copy of this list."
         # NB: This copy is necessary to appease RPython.
-        return FlexList(self.objs[:])
+        return FlexList(self.getObjs()[:])
 
     @method("Any", "Any", _verb="diverge")
     def divergeGuard(self, guard):
         "A mutable copy of this list, guarded by `guard`."
-        return FlexList(self.objs[:], guard=guard)
+        return FlexList(self.getObjs()[:], guard=guard)
 
     @method("Any", "Int")
     def get(self, index):
@@ -550,12 +601,14 @@ class ConstList(Object):
             raise userError(u"get/1: Index %d cannot be negative" % index)
 
         try:
-            return self.objs[index]
+            return self.getObjs()[index]
         except IndexError:
             raise userError(u"get/1: Index %d is out of bounds" % index)
 
     @method("Any")
     def last(self):
+        if self.objs is None:
+            return self._tail[-1]
         if self.objs:
             return self.objs[-1]
         else:
@@ -569,15 +622,15 @@ class ConstList(Object):
         elif count == 0:
             return []
         else:
-            return self.objs * count
+            return self.getObjs() * count
 
     @method("List")
     def reverse(self):
-        l = self.objs[:]
+        l = self.getObjs()[:]
         l.reverse()
         return l
 
-    @method("List", "Int", "Any", _verb="with")
+    @method("Any", "Int", "Any", _verb="with")
     def _with(self, index, value):
         # Replace by index.
         return self.put(index, value)
@@ -591,13 +644,13 @@ class ConstList(Object):
     @method("Any")
     def _makeIterator(self):
         # XXX could be more efficient with case analysis
-        return listIterator(self.objs)
+        return listIterator(self.getObjs())
 
     @method("Map")
     def asMap(self):
         from typhon.objects.collections.maps import monteMap
         d = monteMap()
-        for i, o in enumerate(self.objs):
+        for i, o in enumerate(self.getObjs()):
             d[IntObject(i)] = o
         return d
 
@@ -605,14 +658,14 @@ class ConstList(Object):
     def asSet(self):
         from typhon.objects.collections.sets import monteSet
         d = monteSet()
-        for o in self.objs:
+        for o in self.getObjs():
             d[o] = None
         return d
 
     @method("Int", "List")
     @profileTyphon("List.op__cmp/1")
     def op__cmp(self, other):
-        for i, left in enumerate(self.objs):
+        for i, left in enumerate(self.getObjs()):
             try:
                 right = other[i]
             except IndexError:
@@ -628,13 +681,13 @@ class ConstList(Object):
                 return 1
         # They could be longer than us but we were equal up to this point.
         # Do a final length check.
-        return 0 if len(self.objs) == len(other) else -1
+        return 0 if len(self.getObjs()) == len(other) else -1
 
     @method("Bool", "Any")
     @profileTyphon("List.contains/1")
     def contains(self, needle):
         from typhon.objects.equality import EQUAL, optSame
-        for specimen in self.objs:
+        for specimen in self.getObjs():
             if optSame(needle, specimen) is EQUAL:
                 return True
         return False
@@ -643,29 +696,26 @@ class ConstList(Object):
     @profileTyphon("List.indexOf/1")
     def indexOf(self, needle):
         from typhon.objects.equality import EQUAL, optSame
-        for index, specimen in enumerate(self.objs):
+        for index, specimen in enumerate(self.getObjs()):
             if optSame(needle, specimen) is EQUAL:
                 return index
         return -1
 
-    @method.py("List", "Any", _verb="with")
+    @method.py("Any", "Any", _verb="with")
     @profileTyphon("List.with/1")
     def with_(self, obj):
-        if not self.objs:
-            return [obj]
-        else:
-            return self.objs + [obj]
+        return self.extend([obj])
 
-    @method.py("List", "Int", "Any")
+    @method.py("Any", "Int", "Any")
     def put(self, index, value):
-        top = len(self.objs)
+        top = self._size
         if index == top:
             return self.with_(value)
         else:
             try:
-                objs = self.objs[:]
+                objs = self.getObjs()[:]
                 objs[index] = value
-                return objs
+                return ConstList(objs)
             except IndexError:
                 raise userError(u"put/2: Index %d out of bounds for list of length %d" %
                                 (index, top))
@@ -673,19 +723,19 @@ class ConstList(Object):
     @method.py("Int")
     @elidable
     def size(self):
-        return len(self.objs)
+        return self._size
 
     @method("Bool")
     def isEmpty(self):
-        return not self.objs
+        return not self._size
 
     @method("List", "Int")
     def slice(self, start):
         if start < 0:
             raise userError(u"slice/1: Negative start")
-        stop = len(self.objs)
+        stop = len(self.getObjs())
         start = min(start, stop)
-        return self.objs[start:stop]
+        return self.getObjs()[start:stop]
 
     @method("List", "Int", "Int", _verb="slice")
     def _slice(self, start, stop):
@@ -693,9 +743,9 @@ class ConstList(Object):
             raise userError(u"slice/1: Negative start")
         if stop < 0:
             raise userError(u"slice/2: Negative stop")
-        stop = min(stop, len(self.objs))
+        stop = min(stop, len(self.getObjs()))
         start = min(start, stop)
-        return self.objs[start:stop]
+        return self.getObjs()[start:stop]
 
     @method("Any")
     def snapshot(self):
@@ -704,7 +754,7 @@ class ConstList(Object):
     @method("List")
     @profileTyphon("List.sort/0")
     def sort(self):
-        l = self.objs[:]
+        l = self.getObjs()[:]
         MonteSorter(l).sort()
         return l
 
@@ -719,10 +769,11 @@ class ConstList(Object):
                     start)
         # This is quadratic. It could be better.
         from typhon.objects.equality import EQUAL, optSame
-        for index in range(start, len(self.objs)):
+        objs = self.getObjs()
+        for index in range(start, len(objs)):
             for needleIndex, needle in enumerate(needleCL):
                 offset = index + needleIndex
-                if optSame(self.objs[offset], needle) is not EQUAL:
+                if optSame(objs[offset], needle) is not EQUAL:
                     break
                 return index
         return -1
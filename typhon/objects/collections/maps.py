@@ -57,24 +57,65 @@ class ConstMap(Object):
     An ordered map of objects.
     """
 
-    _immutable_fields_ = "objectMap",
+    _immutable_fields_ = "objectMap?",
+
+    # When objectMap is None, this map is _parent with a single edit: _key is
+    # mapped to _value, or removed when _value is None. Chains of edits are
+    # only copied into a fresh dictionary once somebody reads the map, so
+    # building a map up one key at a time is linear rather than quadratic.
+    _parent = None
+    _key = None
+    _value = None
+
+    _isSettled = False
 
     def __init__(self, objectMap):
         self.objectMap = objectMap
 
+    def edit(self, key, value):
+        m = ConstMap(None)
+        m._parent = self
+        m._key = key
+        m._value = value
+        return m
+
+    def getMap(self):
+        if self.objectMap is None:
+            self.materialize()
+        return self.objectMap
+
+    def materialize(self):
+        edits = []
+        base = self
+        while base.objectMap is None:
+            edits.append(base)
+            base = base._parent
+        d = base.objectMap.copy()
+        # Edits were collected newest first.
+        i = len(edits)
+        while i > 0:
+            i -= 1
+            edit = edits[i]
+            if edit._value is None:
+                d.pop(edit._key, None)
+            else:
+                d[edit._key] = edit._value
+        self.objectMap = d
+        self._parent = self._key = self._value = None
+
     @method("Void", "Any")
     def _printOn(self, printer):
         printer.call(u"print", [StrObject(u"[")])
         i = 0
-        for k, v in self.objectMap.iteritems():
+        for k, v in self.getMap().iteritems():
             printer.call(u"quote", [k])
             printer.call(u"print", [StrObject(u" => ")])
             printer.call(u"quote", [v])
-            if i + 1 < len(self.objectMap):
+            if i + 1 < len(self.getMap()):
                 printer.call(u"print", [StrObject(u", ")])
             i += 1
         printer.call(u"print", [StrObject(u"]")])
-        if len(self.objectMap) == 0:
+        if len(self.getMap()) == 0:
             printer.call(u"print", [StrObject(u".asMap()")])
 
     def computeHash(self, depth):
@@ -98,29 +139,35 @@ class ConstMap(Object):
         return toString(self)
 
     def isSettled(self, sofar=None):
-        if sofar is None:
+        # Same caching discipline as ConstList.isSettled/1.
+        if self._isSettled:
+            return True
+        toplevel = sofar is None
+        if toplevel:
             sofar = {self: None}
-        for k, v in self.objectMap.iteritems():
+        for k, v in self.getMap().iteritems():
             if k not in sofar and not k.isSettled(sofar=sofar):
                 return False
             if v not in sofar and not v.isSettled(sofar=sofar):
                 return False
+        if toplevel:
+            self._isSettled = True
         return True
 
     @method.py("Bool")
     def empty(self):
-        return not self.objectMap
+        return not self.getMap()
 
     @method("Set")
     def asSet(self):
         # COW optimization.
-        return self.objectMap
+        return self.getMap()
 
     @method("Any")
     def diverge(self):
         "A mutable copy of this map."
         # Don't need to copy here; FlexMap's constructor makes the copy.
-        return FlexMap(self.objectMap)
+        return FlexMap(self.getMap())
 
     @method("Any", "Any", "Any", _verb="diverge")
     def divergeGuard(self, keyGuard, valueGuard):
@@ -128,35 +175,35 @@ class ConstMap(Object):
         A mutable copy of this map, with keys guarded by `keyGuard` and
         values by `valueGuard`.
         """
-        return FlexMap(self.objectMap, keyGuard=keyGuard,
+        return FlexMap(self.getMap(), keyGuard=keyGuard,
                        valueGuard=valueGuard)
 
     @method("Any", "Any", "Any")
     def fetch(self, key, thunk):
-        rv = self.objectMap.get(key, None)
+        rv = self.getMap().get(key, None)
         if rv is None:
             rv = thunk.call(u"run", [])
         return rv
 
     @method("List")
     def getKeys(self):
-        return self.objectMap.keys()
+        return self.getMap().keys()
 
     @method("List")
     def getValues(self):
-        return self.objectMap.values()
+        return self.getMap().values()
 
     @method("Any", "Any")
     def get(self, key):
         try:
-            return self.objectMap[key]
+            return self.getMap()[key]
         except KeyError:
             raise userError(u"Key not found: %s" % (key.toString(),))
 
     @method("Map")
     def reverse(self):
         d = monteMap()
-        l = [(k, v) for k, v in self.objectMap.iteritems()]
+        l = [(k, v) for k, v in self.getMap().iteritems()]
         # Reverse it!
         l.reverse()
         for k, v in l:
@@ -167,7 +214,7 @@ class ConstMap(Object):
     def sortKeys(self):
         # Extract a list, sort it, pack it back into a dict.
         d = monteMap()
-        l = [(k, v) for k, v in self.objectMap.iteritems()]
+        l = [(k, v) for k, v in self.getMap().iteritems()]
         KeySorter(l).sort()
         for k, v in l:
             d[k] = v
@@ -177,54 +224,50 @@ class ConstMap(Object):
     def sortValues(self):
         # Same as sortKeys/0.
         d = monteMap()
-        l = [(k, v) for k, v in self.objectMap.iteritems()]
+        l = [(k, v) for k, v in self.getMap().iteritems()]
         ValueSorter(l).sort()
         for k, v in l:
             d[k] = v
         return d
 
-    @method.py("Map", "Any", "Any", _verb="with")
+    @method.py("Any", "Any", "Any", _verb="with")
     def _with(self, key, value):
         # Replace by key.
-        d = self.objectMap.copy()
-        d[key] = value
-        return d
+        return self.edit(key, value)
 
-    @method("Map", "Any")
+    @method("Any", "Any")
     def without(self, key):
         # Ignore the case where the key wasn't in the map.
-        if key in self.objectMap:
-            d = self.objectMap.copy()
-            del d[key]
-            return d
-        return self.objectMap
+        return self.edit(key, None)
 
     @method("Any")
     def _makeIterator(self):
-        return mapIterator(self.objectMap.items())
+        return mapIterator(self.getMap().items())
 
     @method("List")
     def _uncall(self):
         from typhon.objects.collections.lists import wrapList
         from typhon.scopes.safe import theMakeMap
         pairs = wrapList([wrapList([k, v])
-                          for k, v in self.objectMap.items()])
+                          for k, v in self.getMap().items()])
         rv = wrapList([pairs])
         return [theMakeMap, StrObject(u"fromPairs"), rv, EMPTY_MAP]
 
     @method.py("Bool", "Any")
     def contains(self, needle):
-        return needle in self.objectMap
+        return needle in self.getMap()
 
     @method.py("Map", "Map", _verb="or")
     # @profileTyphon("Map.or/1")
     def _or(self, other):
-        # Maybe we're empty.
-        if not self.objectMap:
+        # Maybe one of us is empty.
+        if not other:
+            return self.getMap()
+        if not self.getMap():
             return other
-        # XXX This is currently linear time. Can it be better? If not, prove
-        # it, please.
-        rv = self.objectMap.copy()
+        # This is linear in the size of both maps, since the result has to
+        # be a fresh dictionary holding everything in both.
+        rv = self.getMap().copy()
         for ok, ov in other.items():
             if ok not in rv:
                 rv[ok] = ov
@@ -234,7 +277,7 @@ class ConstMap(Object):
     def slice(self, start):
         if start < 0:
             raise userError(u"slice/1: Negative start")
-        items = self.objectMap.items()[start:]
+        items = self.getMap().items()[start:]
         rv = monteMap()
         for k, v in items:
             rv[k] = v
@@ -246,7 +289,7 @@ class ConstMap(Object):
             raise userError(u"slice/1: Negative start")
         if stop < 0:
             raise userError(u"slice/1: Negative stop")
-        items = self.objectMap.items()[start:stop]
+        items = self.getMap().items()[start:stop]
         rv = monteMap()
         for k, v in items:
             rv[k] = v
@@ -254,24 +297,24 @@ class ConstMap(Object):
 
     @method.py("Int")
     def size(self):
-        return len(self.objectMap)
+        return len(self.getMap())
 
     @method.py("Bool")
     def isEmpty(self):
-        return not self.objectMap
+        return not self.getMap()
 
     @method("Map")
     def snapshot(self):
         # This is a copy-on-write optimization; we are trusting the rest of
         # the functions on this map to not alter the map.
-        return self.objectMap
+        return self.getMap()
 
     def extractStringKey(self, k, default):
         """
         Extract a string key from this map. On failure, return `default`.
         """
 
-        return self.objectMap.get(StrObject(k), default)
+        return self.getMap().get(StrObject(k), default)
 
     def withStringKey(self, k, v):
         """
@@ -280,7 +323,7 @@ class ConstMap(Object):
         Like Monte m`self.with(k :Str, v)`.
         """
 
-        return ConstMap(self._with(StrObject(k), v))
+        return self._with(StrObject(k), v)
 
     def iteritems(self):
         """
@@ -289,10 +332,36 @@ class ConstMap(Object):
         The normal caveats apply.
         """
 
-        return self.objectMap.iteritems()
+        return self.getMap().iteritems()
 
 EMPTY_MAP = ConstMap(monteMap())
 
+# The key of the Miranda FAIL named argument. Prebuilt, since it is probed on
+# every call and turn which carries named arguments.
+FAIL_KEY = StrObject(u"FAIL")
+
+
+def hasMirandaFail(namedArgs):
+    """
+    Whether a map of named arguments already has a FAIL.
+    """
+
+    return FAIL_KEY in namedArgs.getMap()
+
+
+def withMirandaFail(namedArgs, fail):
+    """
+    Add `fail` as the FAIL named argument, unless one is already present.
+
+    The map is only copied when FAIL has to be added.
+    """
+
+    if hasMirandaFail(namedArgs):
+        return namedArgs
+    d = namedArgs.getMap().copy()
+    d[FAIL_KEY] = fail
+    return ConstMap(d)
+
 
 @autohelp
 class FlexMap(Object):
@@ -529,7 +598,7 @@ def unwrapMap(o):
     from typhon.objects.refs import resolution
     m = resolution(o)
     if isinstance(m, ConstMap):
-        return m.objectMap
+        return m.getMap()
     if isinstance(m, FlexMap):
         return m.objectMap
     raise WrongType(u"Specimen is not Map: " + m.toString())
@@ -31,12 +31,28 @@ class ConstSet(Object):
 
     _immutable_fields_ = "objectSet",
 
+    _isSettled = False
+
     def __init__(self, objectSet):
         self.objectSet = objectSet
 
     def toString(self):
         return toString(self)
 
+    def isSettled(self, sofar=None):
+        # Same caching discipline as ConstList.isSettled/1.
+        if self._isSettled:
+            return True
+        toplevel = sofar is None
+        if toplevel:
+            sofar = {self: None}
+        for k in self.objectSet.keys():
+            if k not in sofar and not k.isSettled(sofar=sofar):
+                return False
+        if toplevel:
+            self._isSettled = True
+        return True
+
     def computeHash(self, depth):
         from typhon.objects.equality import samenessHash
         return samenessHash(self, depth, None)
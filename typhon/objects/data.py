@@ -1842,6 +1842,11 @@ class strIterator(Object):
             throwStr(ej, u"next/1: Iterator exhausted")
 
 
+# Concatenations shorter than this are copied right away; longer ones are
+# kept as ropes and only copied once something looks at their contents. ~ C.
+ROPE_THRESHOLD = 256
+
+
 @autohelp
 @audited.DFSelfless
 class StrObject(Object):
@@ -1849,68 +1854,81 @@ class StrObject(Object):
     A string of Unicode text.
     """
 
-    _immutable_fields_ = "_s",
+    _immutable_fields_ = "_s?", "_size"
 
-    def __init__(self, s):
-        assert s is not None, "perverse"
-        self._s = s
+    # When _s is None, this string is the concatenation of _left and _right.
+    _left = None
+    _right = None
+
+    def __init__(self, s, left=None, right=None):
+        if left is not None and right is not None:
+            # A rope; see concatStr().
+            self._s = None
+            self._size = left._size + right._size
+            self._left = left
+            self._right = right
+        else:
+            assert s is not None, "perverse"
+            self._s = s
+            self._size = len(s)
 
     def toString(self):
-        return self._s
+        return self.getString()
 
     def toQuote(self):
-        return quoteStr(self._s)
+        return quoteStr(self.getString())
 
     def computeHash(self, depth):
         # Cribbed from RPython's _hash_string.
-        length = len(self._s)
+        s = self.getString()
+        length = len(s)
         if length == 0:
             return -1
-        x = ord(self._s[0]) << 7
+        x = ord(s[0]) << 7
         i = 0
         while i < length:
-            x = intmask((1000003 * x) ^ ord(self._s[i]))
+            x = intmask((1000003 * x) ^ ord(s[i]))
             i += 1
         x ^= length
         return intmask(x)
 
     def sizeOf(self):
         return (rgc.get_rpy_memory_usage(self) +
-                rgc.get_rpy_memory_usage(self._s))
+                rgc.get_rpy_memory_usage(self.getString()))
 
     def optInterface(self):
         return getGlobalValue(u"Str")
 
-    @method("Str", "Any")
+    @method("Any", "Any")
     def add(self, other):
         if isinstance(other, StrObject):
-            return self._s + other._s
+            return concatStr(self, other)
         if isinstance(other, CharObject):
-            return self._s + unicode(other._c)
+            return concatStr(self, StrObject(unicode(other._c)))
         raise WrongType(u"Not a string or char!")
 
     @method("Bool", "Any")
     def contains(self, needle):
         if isinstance(needle, CharObject):
-            return needle._c in self._s
+            return needle._c in self.getString()
         if isinstance(needle, StrObject):
-            return needle._s in self._s
+            return needle.getString() in self.getString()
         raise WrongType(u"Not a string or char!")
 
     @method("Bool", "Str")
     def startsWith(self, s):
         "Whether this string has `s` as a prefix."
-        return self._s.startswith(s)
+        return self.getString().startswith(s)
 
     @method("Bool", "Str")
     def endsWith(self, s):
-        return self._s.endswith(s)
+        return self.getString().endswith(s)
 
     @method("Char", "Int")
     def get(self, index):
-        if not 0 <= index < len(self._s):
+        if not 0 <= index < self._size:
             raise userError(u"string.get/1: Index out of bounds: %d" % index)
-        return self._s[index]
+        return self.getString()[index]
 
     @method("Void")
     def getSpan(self):
@@ -1918,48 +1936,48 @@ class StrObject(Object):
 
     @method("Int", "Str")
     def indexOf(self, needle):
-        return self._s.find(needle)
+        return self.getString().find(needle)
 
     @method("Int", "Str", "Int", _verb="indexOf")
     def _indexOf(self, needle, offset):
         if offset < 0:
             raise userError(u"indexOf/2: Negative offset %d not supported"
                             % offset)
-        return self._s.find(needle, offset)
+        return self.getString().find(needle, offset)
 
     @method("Int", "Str")
     def lastIndexOf(self, needle):
-        return self._s.rfind(needle)
+        return self.getString().rfind(needle)
 
     @method("Str", "Int")
     def multiply(self, amount):
-        return self._s * amount
+        return self.getString() * amount
 
     @method("Int", "Str")
     def op__cmp(self, other):
-        return cmp(self._s, other)
+        return cmp(self.getString(), other)
 
     @method("Str", "Str", "Str")
     def replace(self, src, dest):
-        return replace(self._s, src, dest)
+        return replace(self.getString(), src, dest)
 
     @method("Str")
     def quote(self):
-        return quoteStr(self._s)
+        return quoteStr(self.getString())
 
     @method("Int")
     def size(self):
-        return len(self._s)
+        return self._size
 
     @method("Bool")
     def isEmpty(self):
-        return not self._s
+        return self._size == 0
 
     @method("Str", "Int")
     def slice(self, start):
         if start < 0:
             raise userError(u"Slice start cannot be negative")
-        return self._s[start:]
+        return self.getString()[start:]
 
     @method("Str", "Int", "Int", _verb="slice")
     def _slice(self, start, stop):
@@ -1967,33 +1985,49 @@ class StrObject(Object):
             raise userError(u"Slice start cannot be negative")
         if stop < 0:
             raise userError(u"Slice stop cannot be negative")
-        return self._s[start:stop]
+        return self.getString()[start:stop]
 
-    @method("Str", "Char", _verb="with")
+    @method("Any", "Char", _verb="with")
     def _with(self, c):
-        return self._s + c
+        return concatStr(self, StrObject(unicode(c)))
 
     @method("Any")
     def _makeIterator(self):
-        return strIterator(self._s)
+        return strIterator(self.getString())
 
     def getString(self):
+        if self._s is None:
+            self.flatten()
         return self._s
 
+    def flatten(self):
+        ub = UnicodeBuilder(self._size)
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._s is None:
+                stack.append(node._right)
+                stack.append(node._left)
+            else:
+                ub.append(node._s)
+        self._s = ub.build()
+        self._left = self._right = None
+
     @method("List")
     def asList(self):
-        return [CharObject(c) for c in self._s]
+        return [CharObject(c) for c in self.getString()]
 
     @method("Set")
     def asSet(self):
         from typhon.objects.collections.sets import monteSet
         d = monteSet()
-        for c in self._s:
+        for c in self.getString():
             d[CharObject(c)] = None
         return d
 
     @method("Str", "List")
     def join(self, pieces):
+        sep = self.getString()
         ub = UnicodeBuilder()
         first = True
         for s in pieces:
@@ -2002,7 +2036,7 @@ class StrObject(Object):
             if first:
                 first = False
             else:
-                ub.append(self._s)
+                ub.append(sep)
 
             string = unwrapStr(s)
 
@@ -2011,48 +2045,72 @@ class StrObject(Object):
 
     @method("List", "Str")
     def split(self, splitter):
-        return [StrObject(s) for s in split(self._s, splitter)]
+        return [StrObject(s) for s in split(self.getString(), splitter)]
 
     @method("List", "Str", "Int", _verb="split")
     def _split(self, splitter, splits=-1):
-        return [StrObject(s) for s in split(self._s, splitter, splits)]
+        pieces = split(self.getString(), splitter, splits)
+        return [StrObject(s) for s in pieces]
 
     @method("Str")
     def toLowerCase(self):
         # Use current size as a size hint. In the best case, characters
         # are one-to-one; in the next-best case, we overestimate and end
         # up with a couple bytes of slop.
-        ub = UnicodeBuilder(len(self._s))
-        for char in self._s:
+        ub = UnicodeBuilder(len(self.getString()))
+        for char in self.getString():
             ub.append(unichr(unicodedb.tolower(ord(char))))
         return ub.build()
 
     @method("Str")
     def toUpperCase(self):
         # Same as toLowerCase().
-        ub = UnicodeBuilder(len(self._s))
-        for char in self._s:
+        ub = UnicodeBuilder(len(self.getString()))
+        for char in self.getString():
             ub.append(unichr(unicodedb.toupper(ord(char))))
         return ub.build()
 
     @method("Str")
     def trim(self):
-        if len(self._s) == 0:
+        s = self.getString()
+        if len(s) == 0:
             return u""
 
         left = 0
-        right = len(self._s)
+        right = len(s)
 
-        while left < right and unicodedb.isspace(ord(self._s[left])):
+        while left < right and unicodedb.isspace(ord(s[left])):
             left += 1
 
-        while left < right and unicodedb.isspace(ord(self._s[right - 1])):
+        while left < right and unicodedb.isspace(ord(s[right - 1])):
             right -= 1
 
         assert right >= 0, "StrObject.trim/0: Proven impossible"
-        return self._s[left:right]
+        return s[left:right]
 
 
+def concatStr(left, right):
+    """
+    Concatenate two strings, deferring the copy if the result is long.
+    """
+
+    size = left._size + right._size
+    if size < ROPE_THRESHOLD:
+        return StrObject(left.getString() + right.getString())
+    if left._size == 0:
+        return right
+    if right._size == 0:
+        return left
+    if left._s is None:
+        # Fold short appends into the rope's last piece, so that building a
+        # string a bit at a time doesn't make a node for every bit.
+        last = left._right
+        if (last._s is not None and
+                last._size + right._size < ROPE_THRESHOLD):
+            return StrObject(None, left._left,
+                             StrObject(last._s + right.getString()))
+    return StrObject(None, left, right)
+
 def unwrapStr(o):
     from typhon.objects.refs import resolution
     s = resolution(o)
@@ -2117,30 +2175,44 @@ class BytesObject(Object):
     A string of bytes.
     """
 
-    _immutable_fields_ = "_bs",
+    _immutable_fields_ = "_bs?", "_size"
 
-    def __init__(self, s):
-        self._bs = s
+    # When _bs is None, this bytestring is the concatenation of _left and
+    # _right.
+    _left = None
+    _right = None
+
+    def __init__(self, s, left=None, right=None):
+        if left is not None and right is not None:
+            # A rope; see concatBytes().
+            self._bs = None
+            self._size = left._size + right._size
+            self._left = left
+            self._right = right
+        else:
+            self._bs = s
+            self._size = len(s)
 
     def toString(self):
-        return bytesToString(self._bs)
+        return bytesToString(self.getBytes())
 
     def computeHash(self, depth):
         # Cribbed from RPython's _hash_string.
-        length = len(self._bs)
+        s = self.getBytes()
+        length = len(s)
         if length == 0:
             return -1
-        x = ord(self._bs[0]) << 7
+        x = ord(s[0]) << 7
         i = 0
         while i < length:
-            x = intmask((1000003 * x) ^ ord(self._bs[i]))
+            x = intmask((1000003 * x) ^ ord(s[i]))
             i += 1
         x ^= length
         return intmask(x)
 
     def sizeOf(self):
         return (rgc.get_rpy_memory_usage(self) +
-                rgc.get_rpy_memory_usage(self._bs))
+                rgc.get_rpy_memory_usage(self.getBytes()))
 
     def optInterface(self):
         return getGlobalValue(u"Bytes")
@@ -2150,73 +2222,73 @@ class BytesObject(Object):
         from typhon.objects.makers import theMakeBytes
         from typhon.objects.collections.lists import wrapList
         from typhon.objects.collections.maps import EMPTY_MAP
-        ints = [IntObject(ord(c)) for c in self._bs]
+        ints = [IntObject(ord(c)) for c in self.getBytes()]
         return [theMakeBytes, StrObject(u"fromInts"),
                 wrapList([wrapList(ints)]), EMPTY_MAP]
 
-    @method("Bytes", "Any")
+    @method("Any", "Any")
     def add(self, other):
         if isinstance(other, BytesObject):
-            return self._bs + other._bs
+            return concatBytes(self, other)
         if isinstance(other, IntObject):
-            return self._bs + str(chr(other._i))
+            return concatBytes(self, BytesObject(str(chr(other._i))))
         raise WrongType(u"Not an int or bytestring!")
 
     @method("Bool", "Any")
     def contains(self, needle):
         if isinstance(needle, IntObject):
-            return chr(needle._i) in self._bs
+            return chr(needle._i) in self.getBytes()
         if isinstance(needle, BytesObject):
-            return needle._bs in self._bs
+            return needle.getBytes() in self.getBytes()
         raise WrongType(u"Not an int or bytestring!")
 
     @method("Int", "Int")
     def get(self, index):
-        if not 0 <= index < len(self._bs):
+        if not 0 <= index < self._size:
             raise userError(u"string.get/1: Index out of bounds: %d" %
                             index)
-        return ord(self._bs[index])
+        return ord(self.getBytes()[index])
 
     @method("Int", "Bytes")
     def indexOf(self, needle):
-        return self._bs.find(needle)
+        return self.getBytes().find(needle)
 
     @method("Int", "Bytes", "Int", _verb="indexOf")
     def _indexOf(self, needle, offset):
         if offset < 0:
             raise userError(u"indexOf/2: Negative offset %d not supported"
                             % offset)
-        return self._bs.find(needle, offset)
+        return self.getBytes().find(needle, offset)
 
     @method("Int", "Bytes")
     def lastIndexOf(self, needle):
-        return self._bs.rfind(needle)
+        return self.getBytes().rfind(needle)
 
     @method("Bytes", "Int")
     def multiply(self, amount):
-        return self._bs * amount
+        return self.getBytes() * amount
 
     @method("Int", "Bytes")
     def op__cmp(self, other):
-        return cmp(self._bs, other)
+        return cmp(self.getBytes(), other)
 
     @method("Bytes", "Bytes", "Bytes")
     def replace(self, src, dest):
-        return replace(self._bs, src, dest)
+        return replace(self.getBytes(), src, dest)
 
     @method("Int")
     def size(self):
-        return len(self._bs)
+        return self._size
 
     @method("Bool")
     def isEmpty(self):
-        return not self._bs
+        return self._size == 0
 
     @method("Bytes", "Int")
     def slice(self, start):
         if start < 0:
             raise userError(u"Slice start cannot be negative")
-        return self._bs[start:]
+        return self.getBytes()[start:]
 
     @method("Bytes", "Int", "Int", _verb="slice")
     def _slice(self, start, stop):
@@ -2224,33 +2296,49 @@ class BytesObject(Object):
             raise userError(u"Slice start cannot be negative")
         if stop < 0:
             raise userError(u"Slice stop cannot be negative")
-        return self._bs[start:stop]
+        return self.getBytes()[start:stop]
 
-    @method("Bytes", "Int", _verb="with")
+    @method("Any", "Int", _verb="with")
     def _with(self, i):
-        return self._bs + chr(i)
+        return concatBytes(self, BytesObject(chr(i)))
 
     @method("Any")
     def _makeIterator(self):
-        return bytesIterator(self._bs)
+        return bytesIterator(self.getBytes())
 
     def getBytes(self):
+        if self._bs is None:
+            self.flatten()
         return self._bs
 
+    def flatten(self):
+        sb = StringBuilder(self._size)
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._bs is None:
+                stack.append(node._right)
+                stack.append(node._left)
+            else:
+                sb.append(node._bs)
+        self._bs = sb.build()
+        self._left = self._right = None
+
     @method("List")
     def asList(self):
-        return [IntObject(ord(c)) for c in self._bs]
+        return [IntObject(ord(c)) for c in self.getBytes()]
 
     @method("Set")
     def asSet(self):
         from typhon.objects.collections.sets import monteSet
         d = monteSet()
-        for c in self._bs:
+        for c in self.getBytes():
             d[IntObject(ord(c))] = None
         return d
 
     @method("Bytes", "List")
     def join(self, pieces):
+        sep = self.getBytes()
         sb = StringBuilder()
         first = True
         for s in pieces:
@@ -2259,7 +2347,7 @@ class BytesObject(Object):
             if first:
                 first = False
             else:
-                sb.append(self._bs)
+                sb.append(sep)
 
             string = unwrapBytes(s)
 
@@ -2268,37 +2356,60 @@ class BytesObject(Object):
 
     @method("List", "Bytes")
     def split(self, splitter):
-        return [BytesObject(s) for s in split(self._bs, splitter)]
+        return [BytesObject(s) for s in split(self.getBytes(), splitter)]
 
     @method("List", "Bytes", "Int", _verb="split")
     def _split(self, splitter, splits):
-        return [BytesObject(s) for s in split(self._bs, splitter, splits)]
+        pieces = split(self.getBytes(), splitter, splits)
+        return [BytesObject(s) for s in pieces]
 
     @method("Bytes")
     def toLowerCase(self):
-        return self._bs.lower()
+        return self.getBytes().lower()
 
     @method("Bytes")
     def toUpperCase(self):
-        return self._bs.upper()
+        return self.getBytes().upper()
 
     @method("Bytes")
     def trim(self):
-        if len(self._bs) == 0:
+        bs = self.getBytes()
+        if len(bs) == 0:
             return ""
 
         left = 0
-        right = len(self._bs)
+        right = len(bs)
 
-        while left < right and self._bs[left] in string.whitespace:
+        while left < right and bs[left] in string.whitespace:
             left += 1
 
-        while left < right and self._bs[right - 1] in string.whitespace:
+        while left < right and bs[right - 1] in string.whitespace:
             right -= 1
 
         assert right >= 0, "BytesObject.trim/0: Proven impossible"
-        return self._bs[left:right]
+        return bs[left:right]
+
+
+def concatBytes(left, right):
+    """
+    Concatenate two bytestrings, deferring the copy if the result is long.
+    """
 
+    size = left._size + right._size
+    if size < ROPE_THRESHOLD:
+        return BytesObject(left.getBytes() + right.getBytes())
+    if left._size == 0:
+        return right
+    if right._size == 0:
+        return left
+    if left._bs is None:
+        # Fold short appends into the rope's last piece; see concatStr().
+        last = left._right
+        if (last._bs is not None and
+                last._size + right._size < ROPE_THRESHOLD):
+            return BytesObject(None, left._left,
+                               BytesObject(last._bs + right.getBytes()))
+    return BytesObject(None, left, right)
 
 def unwrapBytes(o):
     from typhon.objects.refs import resolution
@@ -56,29 +56,17 @@ def fringeEq(first, second):
     return True
 
 
-def listEq(first, second, cache):
-    # I miss zip().
-    for i, x in enumerate(first):
-        y = second[i]
-
-        # Recurse.
-        equal = optSame(x, y, cache)
-
-        # Note the equality for the rest of this invocation.
-        cache[x, y] = equal
-
-        # And terminate on the first failure.
-        if equal is not EQUAL:
-            return equal
-    # Well, nothing failed, so it would seem that they must be equal.
-    return EQUAL
-
-
 def signOf(x):
     return math.copysign(1, x)
 
 
-def optSame(first, second, cache=None):
+# Marks a pair of objects which can only be compared by comparing their
+# contents: a pair of lists of the same length, or a pair of (semi)transparent
+# objects.
+DEEPER = Equality("DEEPER")
+
+
+def optSame(first, second):
     """
     Determine whether two objects are equal, returning None if a decision
     cannot be reached.
@@ -99,21 +87,121 @@ def optSame(first, second, cache=None):
         # identity check above.
         return NOTYET
 
-    # Our objects are settled. Thus, we should be able to ask for their
-    # resolutions.
-    first = resolution(first)
-    second = resolution(second)
+    return sameSettled(first, second)
 
-    # Two identical objects are equal. Again.
-    if first is second:
-        return EQUAL
 
-    # Are we structurally recursive? If so, return the already-calculated
-    # value.
-    if cache is not None and (first, second) in cache:
-        return cache[first, second]
-    if cache is not None and (second, first) in cache:
-        return cache[second, first]
+def sameSettled(first, second):
+    """
+    Compare two settled objects.
+
+    Nested lists and portrayals are walked with an explicit stack of pairs
+    rather than by recursion, so that deep structures can't overflow the
+    stack. Everything reachable from a settled object is settled, so the
+    pairs on the stack don't need their settledness rechecked.
+    """
+
+    # Pairs still to compare, and whether each is a (semi)transparent pair
+    # whose portrayals have just finished comparing equal.
+    stack = []
+    # Pairs which have been compared, or are being compared. A pair which
+    # is revisited while it is being compared is assumed equal if it is a
+    # pair of lists, and unequal otherwise; this is what breaks cycles. Flat
+    # lists never need this.
+    visited = None
+    while True:
+        # Our objects are settled. Thus, we should be able to ask for
+        # their resolutions.
+        first = resolution(first)
+        second = resolution(second)
+        result = EQUAL
+        # Two identical objects are equal. Again.
+        if first is not second:
+            result = sameShallow(first, second)
+        if result is DEEPER:
+            # Are we structurally recursive? If so, use the
+            # already-calculated value.
+            if visited is not None and (first, second) in visited:
+                result = visited[first, second]
+            elif visited is not None and (second, first) in visited:
+                result = visited[second, first]
+            elif isinstance(first, ConstList):
+                assert isinstance(second, ConstList), "sophistry"
+                firstList = unwrapList(first)
+                secondList = unwrapList(second)
+                # Push in reverse, so that elements are compared in
+                # order.
+                deep = False
+                i = len(firstList)
+                while i > 0:
+                    i -= 1
+                    x = firstList[i]
+                    deep = deep or not isPrimitive(x)
+                    stack.append((x, secondList[i], False))
+                # A list of primitives can't lead back to itself.
+                if deep:
+                    if visited is None:
+                        visited = {}
+                    visited[first, second] = EQUAL
+                result = EQUAL
+            else:
+                if visited is None:
+                    visited = {}
+                visited[first, second] = INEQUAL
+                left, right = portrayals(first, second)
+                stack.append((first, second, True))
+                stack.append((left, right, False))
+                result = EQUAL
+        if result is not EQUAL:
+            return result
+        # Pop the next pair, noting any finished portrayals on the way.
+        while True:
+            if not stack:
+                return EQUAL
+            first, second, finished = stack.pop()
+            if not finished:
+                break
+            assert visited is not None, "forgetful"
+            visited[first, second] = EQUAL
+
+
+def isPrimitive(obj):
+    """
+    Whether an object is compared on first principles and holds no other
+    objects.
+    """
+
+    return (obj is NullObject or obj is TrueObject or obj is FalseObject or
+            isinstance(obj, CharObject) or isinstance(obj, DoubleObject) or
+            isinstance(obj, IntObject) or isinstance(obj, BigInt) or
+            isinstance(obj, StrObject) or isinstance(obj, BytesObject))
+
+
+def portrayals(first, second):
+    """
+    Uncall a pair of (semi)transparent objects.
+    """
+
+    left = first.call(u"_uncall", [])
+    right = second.call(u"_uncall", [])
+
+    if (semitransparentStamp in first.auditorStamps() and
+        semitransparentStamp in second.auditorStamps()):
+        if not isinstance(left, SealedPortrayal):
+            userError(u'Left Semitransparent uncall in sameness comparison '
+                      u'was not a SealedPortrayal!')
+        left = left.portrayal
+        if not isinstance(right, SealedPortrayal):
+            userError(u'Right Semitransparent uncall in sameness comparison '
+                      u'was not a SealedPortrayal!')
+        right = right.portrayal
+    return left, right
+
+
+def sameShallow(first, second):
+    """
+    Compare two distinct, resolved, settled objects without looking inside
+    them, returning DEEPER if their contents must be compared.
+    """
 
     # NB: null, true, and false are all singletons, prebuilt before
     # translation, and as such, their identities cannot possibly vary. Code
@@ -156,32 +244,26 @@ def optSame(first, second, cache=None):
 
     # Strings.
     if isinstance(first, StrObject):
-        return eq(isinstance(second, StrObject) and first._s == second._s)
+        return eq(isinstance(second, StrObject) and
+                  first._size == second._size and
+                  first.getString() == second.getString())
 
     # Bytestrings.
     if isinstance(first, BytesObject):
-        return eq(isinstance(second, BytesObject) and first._bs == second._bs)
+        return eq(isinstance(second, BytesObject) and
+                  first._size == second._size and
+                  first.getBytes() == second.getBytes())
 
     # Lists.
     if isinstance(first, ConstList):
         if not isinstance(second, ConstList):
             return INEQUAL
 
-        firstList = unwrapList(first)
-        secondList = unwrapList(second)
-
         # No point wasting time if the lists are obviously different.
-        if len(firstList) != len(secondList):
+        if first.size() != second.size():
             return INEQUAL
 
-        # Iterate and use a cache of already-seen objects to avoid recursive
-        # problems.
-        if cache is None:
-            cache = {}
-
-        cache[first, second] = EQUAL
-
-        return listEq(firstList, secondList, cache)
+        return DEEPER
 
     if isinstance(first, TraversalKey):
         if not isinstance(second, TraversalKey):
@@ -220,28 +302,7 @@ def optSame(first, second, cache=None):
         if ((transparentStamp in first.auditorStamps() and
                 transparentStamp in second.auditorStamps())
             or isSemitransparent):
-
-            # This could recurse.
-            if cache is None:
-                cache = {}
-            cache[first, second] = INEQUAL
-
-            left = first.call(u"_uncall", [])
-            right = second.call(u"_uncall", [])
-
-            if isSemitransparent:
-                if not isinstance(left, SealedPortrayal):
-                    userError(u'Left Semitransparent uncall in sameness comparison '
-                              u'was not a SealedPortrayal!')
-                left = left.portrayal
-                if not isinstance(right, SealedPortrayal):
-                    userError(u'Right Semitransparent uncall in sameness comparison '
-                              u'was not a SealedPortrayal!')
-                right = right.portrayal
-            # Recurse, add the new value to the cache, and return.
-            rv = optSame(left, right, cache)
-            cache[first, second] = rv
-            return rv
+            return DEEPER
         else:
             return NOTYET
 
@@ -327,69 +388,82 @@ def samenessHash(obj, depth, fringe, path=None):
     return -1
 
 
-def listFringe(o, fringe, path, sofar):
-    result = True
-    for i, x in enumerate(unwrapList(o)):
-        if fringe is None:
-            fr = None
-        else:
-            fr = FringePath(i, path)
-        result &= samenessFringe(x, fr, fringe, sofar)
-        if (not result) and fringe is None:
-            # Unresolved promise found.
-            return False
-    return result
-
-
-def samenessFringe(original, path, fringe, sofar=None):
+def samenessFringe(original, path, fringe):
     """
     Walk an object graph, building up the fringe.
 
     Returns whether the graph is settled.
-    """
-
-    # Resolve the object.
-    o = resolution(original)
-    # Handle primitive cases first.
-    if o in (NullObject, TrueObject, FalseObject):
-        return True
-
-    if (isinstance(o, CharObject) or isinstance(o, DoubleObject) or
-        isinstance(o, IntObject) or isinstance(o, BigInt) or
-        isinstance(o, StrObject) or isinstance(o, BytesObject) or
-        isinstance(o, TraversalKey)):
-        return True
-
-    if isinstance(o, ConstMap) and o.empty():
-        return True
 
-    if sofar is None:
-        sofar = {}
-    elif o in sofar:
-        return True
-
-    if isinstance(o, ConstList):
-        sofar[o] = None
-        return listFringe(o, fringe, path, sofar)
+    Like sameSettled(), this walks lists and portrayals with an explicit
+    stack rather than by recursion. Objects are visited depth-first and in
+    order, so the fringe comes out in the same order as the paths.
+    """
 
-    if selfless in o.auditorStamps():
-        if transparentStamp in o.auditorStamps():
-            sofar[o] = None
-            return samenessFringe(o.call(u"_uncall", []), path, fringe, sofar)
-        if semitransparentStamp in o.auditorStamps():
+    settled = True
+    # Objects still to visit, with their paths.
+    stack = [(original, path)]
+    # Lists and selfless objects which have been visited; this is what
+    # breaks cycles.
+    sofar = None
+    while stack:
+        # Resolve the object.
+        o, path = stack.pop()
+        o = resolution(o)
+        # Handle primitive cases first.
+        if o in (NullObject, TrueObject, FalseObject):
+            continue
+
+        if (isinstance(o, CharObject) or isinstance(o, DoubleObject) or
+            isinstance(o, IntObject) or isinstance(o, BigInt) or
+            isinstance(o, StrObject) or isinstance(o, BytesObject) or
+            isinstance(o, TraversalKey)):
+            continue
+
+        if isinstance(o, ConstMap) and o.empty():
+            continue
+
+        if sofar is None:
+            sofar = {}
+        elif o in sofar:
+            continue
+
+        if isinstance(o, ConstList):
             sofar[o] = None
-            p = o.call(u"_uncall", [])
-            if not isinstance(p, SealedPortrayal):
-                userError(u'Semitransparent portrayal was not a SealedPortrayal!')
-            return samenessFringe(p, path, fringe, sofar)
-
-    if isResolved(o):
-        return True
-
-    # Welp, it's unsettled.
-    if fringe is not None:
+            items = unwrapList(o)
+            # Push in reverse, so that elements are visited in order.
+            i = len(items)
+            while i > 0:
+                i -= 1
+                if fringe is None:
+                    fr = None
+                else:
+                    fr = FringePath(i, path)
+                stack.append((items[i], fr))
+            continue
+
+        if selfless in o.auditorStamps():
+            if transparentStamp in o.auditorStamps():
+                sofar[o] = None
+                stack.append((o.call(u"_uncall", []), path))
+                continue
+            if semitransparentStamp in o.auditorStamps():
+                sofar[o] = None
+                p = o.call(u"_uncall", [])
+                if not isinstance(p, SealedPortrayal):
+                    userError(u'Semitransparent portrayal was not a SealedPortrayal!')
+                stack.append((p, path))
+                continue
+
+        if isResolved(o):
+            continue
+
+        # Welp, it's unsettled.
+        if fringe is None:
+            # Nobody wants the fringe, so one unsettled object is enough.
+            return False
         fringe.append(FringeNode(o, path))
-    return False
+        settled = False
+    return settled
 
 
 class FringePath(object):
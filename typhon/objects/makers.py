@@ -5,7 +5,8 @@ Miscellaneous makers in the safe scope.
 """
 
 from rpython.rlib.rbigint import rbigint
-from rpython.rlib.rstring import ParseStringError
+from rpython.rlib.rstring import (ParseStringError, StringBuilder,
+        UnicodeBuilder)
 from rpython.rlib.rstruct.ieee import unpack_float
 
 from typhon.atoms import getAtom
@@ -14,8 +15,8 @@ from typhon.errors import userError
 from typhon.objects.auditors import deepFrozenStamp
 from typhon.objects.collections.lists import listFromIterable
 from typhon.objects.collections.maps import ConstMap
-from typhon.objects.data import (bytesToString, unwrapInt,
-        unwrapChar)
+from typhon.objects.data import (BytesObject, StrObject, bytesToString,
+        unwrapInt, unwrapChar)
 from typhon.objects.ejectors import throwStr
 from typhon.objects.root import Object, audited, runnable
 from typhon.profile import profileTyphon
@@ -40,6 +41,92 @@ def ensureByteInt(i):
         raise userError(u"Unacceptable bytestring integer: %d" % i)
     return chr(i)
 
+def codePoint(i):
+    try:
+        return unichr(i)
+    except ValueError:
+        raise userError(u"Couldn't convert %d to Unicode code point" % i)
+
+def decodeUTF8(bs):
+    """
+    Decode as much of a UTF-8 bytestring as possible.
+
+    Returns the decoded string and the offset of the first undecoded byte;
+    only a truncated sequence at the end of the input is left undecoded, so
+    that the remainder can be prepended to the next chunk of a stream.
+    Invalid lead bytes are replaced with U+FFFD.
+    """
+
+    size = len(bs)
+    ub = UnicodeBuilder(size)
+    offset = 0
+    while offset < size:
+        b = ord(bs[offset])
+        if b & 0x80 == 0x00:
+            # One byte.
+            ub.append(unichr(b))
+            offset += 1
+        elif b & 0xe0 == 0xc0:
+            # Two bytes.
+            if size - offset < 2:
+                break
+            c = (b & 0x1f) << 6
+            c |= ord(bs[offset + 1]) & 0x3f
+            ub.append(codePoint(c))
+            offset += 2
+        elif b & 0xf0 == 0xe0:
+            # Three bytes.
+            if size - offset < 3:
+                break
+            c = (b & 0x0f) << 12
+            c |= (ord(bs[offset + 1]) & 0x3f) << 6
+            c |= ord(bs[offset + 2]) & 0x3f
+            ub.append(codePoint(c))
+            offset += 3
+        elif b & 0xf8 == 0xf0:
+            # Four bytes.
+            if size - offset < 4:
+                break
+            c = (b & 0x07) << 18
+            c |= (ord(bs[offset + 1]) & 0x3f) << 12
+            c |= (ord(bs[offset + 2]) & 0x3f) << 6
+            c |= ord(bs[offset + 3]) & 0x3f
+            ub.append(codePoint(c))
+            offset += 4
+        else:
+            # Invalid sequence. Move forward and try again.
+            ub.append(u"\ufffd")
+            offset += 1
+    return ub.build(), offset
+
+def encodeUTF8(s):
+    """
+    Encode a string as UTF-8.
+    """
+
+    sb = StringBuilder(len(s))
+    for char in s:
+        i = ord(char)
+        if i < 0x80:
+            # One byte.
+            sb.append(chr(i))
+        elif i < 0x800:
+            # Two bytes.
+            sb.append(chr(0xc0 | (i >> 6)))
+            sb.append(chr(0x80 | (i & 0x3f)))
+        elif i < 0x10000:
+            # Three bytes.
+            sb.append(chr(0xe0 | (i >> 12)))
+            sb.append(chr(0x80 | ((i >> 6) & 0x3f)))
+            sb.append(chr(0x80 | (i & 0x3f)))
+        else:
+            # Four bytes.
+            sb.append(chr(0xf0 | (i >> 18)))
+            sb.append(chr(0x80 | ((i >> 12) & 0x3f)))
+            sb.append(chr(0x80 | ((i >> 6) & 0x3f)))
+            sb.append(chr(0x80 | (i & 0x3f)))
+    return sb.build()
+
 @autohelp
 @audited.DF
 class MakeBytes(Object):
@@ -58,6 +145,14 @@ class MakeBytes(Object):
     def fromInts(self, data):
         return "".join([ensureByteInt(unwrapInt(i)) for i in data])
 
+    @method("Bytes", "Str")
+    def encodeUTF8(self, s):
+        """
+        Encode `s` as UTF-8.
+        """
+
+        return encodeUTF8(s)
+
 theMakeBytes = MakeBytes()
 
 
@@ -206,4 +301,17 @@ class MakeStr(Object):
     def fromChars(self, data):
         return u"".join([unwrapChar(c) for c in data])
 
+    @method("List", "Bytes")
+    def decodeUTF8(self, bs):
+        """
+        Decode as much of the UTF-8 `bs` as possible.
+
+        This method returns a pair of the decoded `Str` and the `Bytes` of
+        any truncated sequence at the end of `bs`, which should be prepended
+        to the next chunk when decoding a stream.
+        """
+
+        s, offset = decodeUTF8(bs)
+        return [StrObject(s), BytesObject(bs[offset:])]
+
 theMakeStr = MakeStr()
@@ -52,7 +52,7 @@ from typhon import ruv
 from typhon.atoms import getAtom
 from typhon.autohelp import autohelp, method
 from typhon.errors import userError
-from typhon.futures import Future, Ok, IOEvent
+from typhon.futures import Future, Ok, OK, IOEvent
 from typhon.macros import macros, io
 from typhon.objects.constants import NullObject
 from typhon.objects.data import BytesObject, StrObject
@@ -182,6 +182,11 @@ class TTYSource(StreamSource):
             ruv.TTYSetMode(self._tty, ruv.TTY_MODE_NORMAL)
 
 
+# The most bytes which a stream sink will gather into a single write. A packet
+# larger than this is still written, but on its own.
+WRITE_BUDGET = 64 * 1024
+
+
 class StreamSinkCleanup(IOEvent):
     def __init__(self, streamSink):
         self.streamSink = streamSink
@@ -190,8 +195,37 @@ class StreamSinkCleanup(IOEvent):
         if self.streamSink.closed:
             return
         self.streamSink.closed = True
-        self.streamSink._stream.release()
-        self.streamSink._stream = None
+        if self.streamSink.flushing:
+            # Let the queued packets go out first; the last flush will
+            # release the stream.
+            return
+        self.streamSink._release()
+
+
+class StreamSinkFlush(IOEvent):
+    def __init__(self, streamSink):
+        self.streamSink = streamSink
+
+    def run(self):
+        self.streamSink._flush()
+
+
+class StreamSinkFlushed(ruv.StreamWriteFutureCallback):
+    def __init__(self, streamSink, resolvers):
+        self.streamSink = streamSink
+        self.resolvers = resolvers
+
+    def do(self, state, result):
+        status, _, err = result
+        if status == OK:
+            for resolver in self.resolvers:
+                resolver.resolve(NullObject)
+            self.streamSink._flushed()
+        else:
+            problem = StrObject(u"libuv error: %s" % err)
+            for resolver in self.resolvers:
+                resolver.smash(problem)
+            self.streamSink._failed(problem)
 
 
 @autohelp
@@ -201,27 +235,115 @@ class StreamSink(Object):
     """
 
     closed = False
+    flushing = False
 
-    def __init__(self, stream, vat):
+    def __init__(self, stream, vat, budget=WRITE_BUDGET):
         self._stream = stream
         self._vat = vat
+        self._budget = budget
+        self._pending = []
+        self._resolvers = []
 
     def _cleanup(self):
         currentVat.get().enqueueEvent(StreamSinkCleanup(self))
 
+    def _release(self):
+        self._stream.release()
+        self._stream = None
+
+    def _takeBatch(self):
+        """
+        Remove the next packets to write, and their resolvers, from the
+        queue.
+
+        As many packets are taken as fit within the budget, but always at
+        least one, so that oversized packets aren't stuck forever.
+        """
+
+        count = 1
+        size = len(self._pending[0])
+        while count < len(self._pending):
+            if size + len(self._pending[count]) > self._budget:
+                break
+            size += len(self._pending[count])
+            count += 1
+        datas = self._pending[:count]
+        resolvers = self._resolvers[:count]
+        del self._pending[:count]
+        del self._resolvers[:count]
+        return datas, resolvers
+
+    def _flush(self):
+        datas, resolvers = self._takeBatch()
+        k = StreamSinkFlushed(self, resolvers)
+        ruv.magic_writev(self._stream._stream, datas).run(None, k)
+
+    def _flushed(self):
+        if self._pending:
+            self._vat.enqueueEvent(StreamSinkFlush(self))
+            return
+        self.flushing = False
+        if self.closed:
+            self._release()
+
+    def _failed(self, problem):
+        """
+        A write failed; the stream is broken, so give up on everything still
+        waiting to be written.
+        """
+
+        for resolver in self._resolvers:
+            resolver.smash(problem)
+        self._pending = []
+        self._resolvers = []
+        self.flushing = False
+        # Nothing more can be sent. If the sink was closed while this write
+        # was out, then cleanup left the stream for us to release.
+        self.closed = True
+        self._release()
+
     @method("Bool")
     def isATTY(self):
         "Whether this sink is writing to a TTY."
         return False
 
-    @method("Void", "Bytes")
+    @method("Int")
+    def getWriteBudget(self):
+        "How many bytes this sink tries to write at once."
+        return self._budget
+
+    @method("Void", "Int")
+    def setWriteBudget(self, budget):
+        """
+        Change how many bytes this sink tries to write at once.
+
+        Packets larger than the budget are still written, one at a time.
+        """
+        if budget < 1:
+            raise userError(u"setWriteBudget/1: Budget must be positive")
+        self._budget = budget
+
+    @method("Any", "Bytes")
     def run(self, data):
+        """
+        Write `data` to the stream.
+
+        The returned promise resolves to null once the data has been
+        written, and breaks if it couldn't be written. Writers which produce
+        data faster than the stream takes it should wait on these promises.
+        """
         if self.closed:
             raise userError(u"run/1: Couldn't send to closed stream")
 
-        # XXX backpressure?
-        with io:
-            ruv.magic_write(self._stream._stream, data)
+        p, r = makePromise()
+        self._pending.append(data)
+        self._resolvers.append(r)
+        # Packets sent during the same turn are written together by the
+        # events which the vat runs after that turn.
+        if not self.flushing:
+            self.flushing = True
+            self._vat.enqueueEvent(StreamSinkFlush(self))
+        return p
 
     @method("Void")
     def complete(self):
@@ -232,7 +354,6 @@ class StreamSink(Object):
         self._cleanup()
 
 
-
 @autohelp
 class TTYSink(StreamSink):
     """
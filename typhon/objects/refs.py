@@ -18,7 +18,7 @@ from typhon.atoms import getAtom
 from typhon.autohelp import autohelp, method
 from typhon.enum import makeEnum
 from typhon.errors import Ejecting, UserException, userError
-from typhon.log import log
+from typhon.log import log, tagMask, wants
 from typhon.objects.auditors import deepFrozenStamp, selfless
 from typhon.objects.constants import NullObject
 from typhon.objects.ejectors import Ejector
@@ -35,6 +35,8 @@ RUN_1 = getAtom(u"run", 1)
 _WHENBROKEN_1 = getAtom(u"_whenBroken", 1)
 _WHENMORERESOLVED_1 = getAtom(u"_whenMoreResolved", 1)
 
+REF = tagMask(["ref"])
+
 
 def makePromise(guard=None):
     vat = currentVat.get()
@@ -843,12 +845,14 @@ def packLocalRef(obj, objVat, originVat):
     assert objVat is not None, "Vat cannot be None"
     assert originVat is not None, "Vat cannot be None"
     if objVat is originVat:
-        log(["ref"], u"Eliding ref from (and to) vat %s" % objVat.name)
+        if wants(REF):
+            log(["ref"], u"Eliding ref from (and to) vat %s" % objVat.name)
         return obj
     elif (isinstance(obj, LocalVatRef) and obj.originVat is objVat and
           obj.targetVat is originVat):
-        log(["ref"], u"Short-circuiting round-trip ref for vat %s" %
-            objVat.name)
+        if wants(REF):
+            log(["ref"], u"Short-circuiting round-trip ref for vat %s" %
+                objVat.name)
         return obj.target
     return LocalVatRef(obj, objVat, originVat)
 
@@ -162,8 +162,11 @@ class Object(object):
         if namedArgsMap is None or namedArgsMap.isEmpty():
             namedArgsMap = MIRANDA_MAP
         else:
-            from typhon.objects.collections.maps import ConstMap
-            namedArgsMap = ConstMap(namedArgsMap._or(MIRANDA_ARGS))
+            # Most named arguments arrive with FAIL already attached, by the
+            # evaluator or by the vat, and then this won't copy them.
+            from typhon.objects.collections.maps import withMirandaFail
+            from typhon.objects.ejectors import theThrower
+            namedArgsMap = withMirandaFail(namedArgsMap, theThrower)
 
         try:
             return self.recvNamed(atom, arguments, namedArgsMap)
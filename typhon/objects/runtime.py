@@ -1,13 +1,18 @@
 from rpython.rlib import rgc
+from rpython.rlib.rvmprof import VMProfError
 from rpython.rtyper.lltypesystem import rffi
 
 from typhon import ruv
 from typhon.autohelp import autohelp, method
+from typhon.errors import userError
+from typhon.metrics import latencies
 from typhon.nano.interp import InterpObject
 from typhon.objects.collections.lists import wrapList
-from typhon.objects.collections.maps import monteMap
+from typhon.objects.collections.maps import ConstMap, monteMap
 from typhon.objects.data import DoubleObject, IntObject, StrObject, unwrapBytes, wrapBytes
 from typhon.objects.root import Object
+from typhon.profile import DEFAULT_INTERVAL, profiler
+from typhon.tracing import tracer
 
 
 # The fun of GC management. This is all very subject to change and only works
@@ -224,6 +229,148 @@ def makeTimerStats():
     return TimerStats(sections)
 
 
+@autohelp
+class RateStats(Object):
+    """
+    How often Typhon's caches and fast paths have been hit.
+
+    Each rate is a pair of the number of hits and the total number of
+    observations. For example, "AuditClipboard report cache" counts how many
+    audits were answered by a report already on file.
+    """
+
+    __immutable__ = True
+
+    def __init__(self, rates):
+        self.rates = rates
+
+    @method("Map")
+    def getRates(self):
+        "A map from rate names to pairs of hits and totals."
+        rv = monteMap()
+        for k, (success, total) in self.rates.items():
+            rv[StrObject(k.decode("utf-8"))] = wrapList([IntObject(success),
+                                                         IntObject(total)])
+        return rv
+
+
+def makeRateStats():
+    from typhon.metrics import globalRecorder
+    recorder = globalRecorder()
+    rates = {}
+    for label, rate in recorder.rates.items():
+        rates[label] = rate.success, rate.total
+    return RateStats(rates)
+
+
+def wrapHistogram(histogram):
+    from rpython.rlib.rfloat import INFINITY
+    from typhon.metrics import BUCKETS
+    buckets = []
+    for i, bound in enumerate(histogram.bounds()):
+        buckets.append(wrapList([DoubleObject(bound),
+                                 IntObject(histogram.counts[i])]))
+    buckets.append(wrapList([DoubleObject(INFINITY),
+                             IntObject(histogram.counts[BUCKETS])]))
+    rv = monteMap()
+    rv[StrObject(u"count")] = IntObject(histogram.count)
+    rv[StrObject(u"sum")] = DoubleObject(histogram.total)
+    rv[StrObject(u"buckets")] = wrapList(buckets)
+    return rv
+
+
+def wrapHistograms(histograms):
+    rv = monteMap()
+    for label, histogram in histograms.items():
+        rv[StrObject(label.decode("utf-8"))] = ConstMap(
+            wrapHistogram(histogram))
+    return rv
+
+
+@autohelp
+class Metrics(Object):
+    """
+    Distributions of how long Typhon has spent on its work, measured on a
+    monotonic wall clock.
+
+    Each histogram is a map with "count", "sum", and "buckets", where the sum
+    is in seconds and each bucket is a pair of its upper bound in seconds and
+    the number of observations which fell into it.
+
+    The global histograms are "io", for time spent in the reactor, and
+    "nanopass compile", for time spent compiling code. Each vat has "queue
+    wait", for how long sends waited before their turns, and "turn latency",
+    for how long turns took.
+
+    Each vat also has gauges: "turn queue high water" and "callback queue
+    high water", the deepest that its queues of sends and of I/O callbacks
+    have ever been.
+
+    Histograms are only recorded while metrics are on; see
+    `startMetrics/0`.
+    """
+
+    __immutable__ = True
+
+    def __init__(self, histograms, vats):
+        self.histograms = histograms
+        self.vats = vats
+
+    @method("Map")
+    def getHistograms(self):
+        "A map from labels to global histograms."
+        return wrapHistograms(self.histograms)
+
+    @method("Map")
+    def getVats(self):
+        "A map from vat names to maps of their histograms."
+        rv = monteMap()
+        for name, histograms, _ in self.vats:
+            rv[StrObject(name.decode("utf-8"))] = ConstMap(
+                wrapHistograms(histograms))
+        return rv
+
+    @method("Map")
+    def getGauges(self):
+        "A map from vat names to maps of their gauge readings."
+        rv = monteMap()
+        for name, _, gauges in self.vats:
+            d = monteMap()
+            for label, value in gauges.items():
+                d[StrObject(label.decode("utf-8"))] = IntObject(value)
+            rv[StrObject(name.decode("utf-8"))] = ConstMap(d)
+        return rv
+
+    @method("Str")
+    def toJSON(self):
+        "Render these metrics as JSON."
+        from typhon.metrics import dumpJSON
+        return dumpJSON(self.histograms, self.vats).decode("utf-8")
+
+    @method("Str")
+    def toPrometheus(self):
+        "Render these metrics in the Prometheus text exposition format."
+        from typhon.metrics import dumpPrometheus
+        return dumpPrometheus(self.histograms, self.vats).decode("utf-8")
+
+
+def copyHistograms(histograms):
+    rv = {}
+    for label, histogram in histograms.items():
+        rv[label] = histogram.copy()
+    return rv
+
+
+def makeMetrics():
+    from typhon.metrics import globalRecorder
+    # XXX what a hack
+    from typhon.vats import currentVat
+    vats = [(vat.name.encode("utf-8"), copyHistograms(vat.getHistograms()),
+             vat.getGauges())
+            for vat in currentVat.get()._manager.vats]
+    return Metrics(copyHistograms(globalRecorder().histograms), vats)
+
+
 @autohelp
 class ConfigConfig(Object):
     """
@@ -285,6 +432,85 @@ class CurrentRuntime(Object):
         "Take a snapshot of how time has been spent."
         return makeTimerStats()
 
+    @method("Any")
+    def getRateStatistics(self):
+        "Take a snapshot of how often caches have been hit."
+        return makeRateStats()
+
+    @method("Any")
+    def getMetrics(self):
+        "Take a snapshot of the latency histograms, globally and per vat."
+        return makeMetrics()
+
+    @method("Void")
+    def startMetrics(self):
+        """
+        Start recording latency histograms.
+
+        Histograms are recorded from startup when Typhon is run with -m.
+        """
+        latencies.start()
+
+    @method("Void")
+    def stopMetrics(self):
+        "Stop recording latency histograms, keeping what was recorded."
+        latencies.stop()
+
+    @method("Void", "Str", interval="Double")
+    def startProfiling(self, path, interval=DEFAULT_INTERVAL):
+        """
+        Start sampling the stack into a vmprof log at `path`, taking a sample
+        every `interval` seconds.
+
+        Monte methods and matchers appear as frames in the log. A large
+        interval is cheap enough to leave running.
+        """
+        try:
+            profiler.start(path.encode("utf-8"), interval)
+        except VMProfError as vpe:
+            raise userError(u"startProfiling/1: %s" % vpe.msg.decode("utf-8"))
+        except OSError as ose:
+            raise userError(u"startProfiling/1: Couldn't open %s (errno %d)"
+                            % (path, ose.errno))
+
+    @method("Void")
+    def stopProfiling(self):
+        "Stop the profiler and finish its log."
+        try:
+            profiler.stop()
+        except VMProfError as vpe:
+            raise userError(u"stopProfiling/0: %s" % vpe.msg.decode("utf-8"))
+
+    @method("Bool")
+    def isProfiling(self):
+        "Whether the profiler is running."
+        return profiler.isRunning()
+
+    @method("Void")
+    def startTracing(self):
+        """
+        Start recording vat turns, I/O, compilation, and module loads into
+        the trace buffer, discarding anything already recorded.
+        """
+        tracer.start()
+
+    @method("Void")
+    def stopTracing(self):
+        "Stop recording into the trace buffer."
+        tracer.stop()
+
+    @method("Void", "Str")
+    def writeTrace(self, path):
+        """
+        Write the trace buffer to `path` as a Chrome trace JSON file, for
+        chrome://tracing or Perfetto.
+        """
+        try:
+            tracer.dump(path.encode("utf-8"))
+        except OSError as ose:
+            raise userError(u"writeTrace/1: Couldn't write %s (errno %d)"
+                            % (path, ose.errno))
+
     @method("Any")
     def getConfiguration(self):
         "Access Typhon's internal configuration."
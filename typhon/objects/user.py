@@ -12,11 +12,12 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-from rpython.rlib.objectmodel import specialize
+from rpython.rlib.objectmodel import r_ordereddict, specialize
+from rpython.rlib.rarithmetic import intmask
 
 from typhon.autohelp import autohelp, method
 from typhon.errors import userError
-from typhon.log import log
+from typhon.log import log, tagMask, wants
 from typhon.objects.auditors import deepFrozenStamp
 from typhon.objects.constants import unwrapBool
 from typhon.objects.collections.helpers import monteSet
@@ -34,6 +35,8 @@ pemci = u".".join([
     u"lo catlu pe ro da",
 ])
 
+AUDIT = tagMask(["audit"])
+
 def boolStr(b):
     return u"true" if b else u"false"
 
@@ -85,14 +88,16 @@ class Audition(Object):
         self.askedLog.append(auditor)
         if auditor in self.cache:
             answer, asked, guards = self.cache[auditor]
-            self.log(u"ask/1: %s: %s (cached)" % (auditor.toString(),
-                boolStr(answer)))
+            if wants(AUDIT):
+                self.log(u"ask/1: %s: %s (cached)" % (auditor.toString(),
+                    boolStr(answer)))
             for name, value in guards:
                 # We remember what the binding guards for the previous
                 # invocation were.
                 if self.guardInfo.getGuard(name) != value:
                     # If any of them have changed, we need to re-audit.
-                    self.log(u"ask/1: %s: Invalidating" % name)
+                    if wants(AUDIT):
+                        self.log(u"ask/1: %s: Invalidating" % name)
                     break
             else:
                 # XXX stopgap: Ignore negative answers in the cache.
@@ -103,7 +108,8 @@ class Audition(Object):
                 # We remember the other auditors invoked during this
                 # audition. Let's re-ask them since not all of them may have
                 # cacheable results.
-                self.log(u"ask/1: Reasking %s" % auditor.toString())
+                if wants(AUDIT):
+                    self.log(u"ask/1: Reasking %s" % auditor.toString())
                 answer = self.ask(a)
             return answer
         else:
@@ -116,18 +122,21 @@ class Audition(Object):
             try:
                 result = unwrapBool(auditor.call(u"audit", [self]))
                 if self.guardLog is None:
-                    self.log(u"ask/1: %s: %s (uncacheable)" %
-                            (auditor.toString(), boolStr(result)))
+                    if wants(AUDIT):
+                        self.log(u"ask/1: %s: %s (uncacheable)" %
+                                (auditor.toString(), boolStr(result)))
                 else:
-                    self.log(u"ask/1: %s: %s" %
-                            (auditor.toString(), boolStr(result)))
+                    if wants(AUDIT):
+                        self.log(u"ask/1: %s: %s" %
+                                (auditor.toString(), boolStr(result)))
                     self.cache[auditor] = (result, self.askedLog[:],
                                            self.guardLog[:])
                 return result
             finally:
                 self.askedLog, self.guardLog = prevlogs
 
-        self.log(u"ask/1: %s: failure" % auditor.toString())
+        if wants(AUDIT):
+            self.log(u"ask/1: %s: failure" % auditor.toString())
         return False
 
     @method.py("Any", "Str")
@@ -140,10 +149,12 @@ class Audition(Object):
                             (name, self.fqn))
         if self.guardLog is not None:
             if answer.auditedBy(deepFrozenStamp):
-                self.log(u"getGuard/1: %s (DF)" % name)
+                if wants(AUDIT):
+                    self.log(u"getGuard/1: %s (DF)" % name)
                 self.guardLog.append((name, answer))
             else:
-                self.log(u"getGuard/1: %s (not DF)" % name)
+                if wants(AUDIT):
+                    self.log(u"getGuard/1: %s (not DF)" % name)
                 self.guardLog = None
         return answer
 
@@ -180,6 +191,8 @@ class AuditorReport(object):
 
 def compareAuditorLists(this, that):
     from typhon.objects.equality import isSameEver
+    if len(this) != len(that):
+        return False
     for i, x in enumerate(this):
         if not isSameEver(x, that[i]):
             return False
@@ -188,42 +201,51 @@ def compareAuditorLists(this, that):
 
 def compareGuardMaps(this, that):
     from typhon.objects.equality import isSameEver
+    if len(this) != len(that):
+        return False
     for i, x in enumerate(this):
         if not isSameEver(x, that[i]):
             return False
     return True
 
 
-class Drawer(object):
-    """
-    A storage system for reports.
+class ReportKey(object):
     """
+    The auditors, and possibly the dynamic guards, that a report was made
+    for.
 
-class DynamicDrawer(Drawer):
-
-    def __init__(self):
-        self.files = []
+    Static reports don't depend on any dynamic guards, and are filed with no
+    guards at all.
+    """
 
-    def findReport(self, guardInfo):
-        gs = guardInfo.dynamicGuards()
-        for guardValues, report in self.files:
-            if compareGuardMaps(guardValues, gs):
-                return report
+    _immutable_ = True
 
-    def makeDynamic(self):
-        return self
+    def __init__(self, auditors, guards):
+        self.auditors = auditors
+        self.guards = guards
 
-class StaticDrawer(Drawer):
+def reportKeyEq(first, second):
+    if not compareAuditorLists(first.auditors, second.auditors):
+        return False
+    if first.guards is None or second.guards is None:
+        return first.guards is None and second.guards is None
+    return compareGuardMaps(first.guards, second.guards)
 
-    def __init__(self, report):
-        self.report = report
+def reportKeyHash(key):
+    h = len(key.auditors)
+    for auditor in key.auditors:
+        h = intmask((1000003 * h) ^ auditor.samenessHash())
+    if key.guards is not None:
+        for guard in key.guards:
+            h = intmask((1000003 * h) ^ guard.samenessHash())
+        h ^= len(key.guards) + 1
+    return h
 
-    def findReport(self, guardInfo):
-        return self.report
 
-    def makeDynamic(self):
-        drawer = DynamicDrawer()
-        drawer.files.append(([], self.report))
+# How many reports each clipboard keeps on file. Most object expressions only
+# ever see one auditor list and a handful of dynamic guards; this bound only
+# matters for guards which are made afresh each time. ~ C.
+CABINET_SIZE = 64
 
 
 class AuditClipboard(object):
@@ -232,16 +254,30 @@ class AuditClipboard(object):
     She's touring the facility / And picking up slack
     """
 
+    # The report at the most recently used end of the cabinet. Finding it
+    # again doesn't need to refile it.
+    newestReport = None
+
     def __init__(self, fqn, ast):
-        self.reportCabinet = []
+        # The cabinet is ordered from least to most recently used.
+        self.reportCabinet = r_ordereddict(reportKeyEq, reportKeyHash)
         self.fqn = fqn
         self.ast = ast
 
-        # This rate is typically less than 0.3%; our caching is very good
+        # This rate is typically more than 99.7%; our caching is very good
         # these days. ~ C.
-        # from typhon.metrics import globalRecorder
-        # self.newReportRate = globalRecorder().getRateFor(
-        #         "AuditClipboard new report")
+        from typhon.metrics import globalRecorder
+        self.reportRate = globalRecorder().getRateFor(
+                "AuditClipboard report cache")
+
+    def findReport(self, key):
+        report = self.reportCabinet.get(key, None)
+        if report is not None and report is not self.newestReport:
+            # Refile the report at the most recently used end.
+            del self.reportCabinet[key]
+            self.reportCabinet[key] = report
+            self.newestReport = report
+        return report
 
     def getReport(self, auditors, guardInfo):
         """
@@ -249,30 +285,28 @@ class AuditClipboard(object):
         combination is on file.
         """
 
-        for auditorList, guardFile in self.reportCabinet:
-            if compareAuditorLists(auditors, auditorList):
-                report = guardFile.findReport(guardInfo)
-                if report is not None:
-                    return report
+        report = self.findReport(ReportKey(auditors, None))
+        if report is None and guardInfo.hasDynamicGuards():
+            report = self.findReport(ReportKey(auditors,
+                                               guardInfo.dynamicGuards()))
+        return report
 
     def putReport(self, auditors, guardInfo, report):
         """
         Keep an audit report on file for these guards and this auditor.
         """
 
-        for i, (auditorList, guardFile) in enumerate(self.reportCabinet):
-            if compareAuditorLists(auditors, auditorList):
-                if report.isDynamic:
-                    gs = guardInfo.dynamicGuards()
-                    guardFile = guardFile.makeDynamic()
-                    assert isinstance(guardFile, DynamicDrawer), "protractor"
-                    guardFile.files.append((gs, report))
-                else:
-                    guardFile = StaticDrawer(report)
-                self.reportCabinet[i] = auditorList, guardFile
-                break
+        if report.isDynamic:
+            key = ReportKey(auditors, guardInfo.dynamicGuards())
         else:
-            self.reportCabinet.append((auditors, StaticDrawer(report)))
+            key = ReportKey(auditors, None)
+        if len(self.reportCabinet) >= CABINET_SIZE:
+            # Evict the least recently used report.
+            for oldest in self.reportCabinet:
+                del self.reportCabinet[oldest]
+                break
+        self.reportCabinet[key] = report
+        self.newestReport = report
 
     def createReport(self, auditors, guardInfo):
         """
@@ -292,8 +326,7 @@ class AuditClipboard(object):
         """
 
         report = self.getReport(auditors, guardInfo)
-        # if self.newReportRate.observe(report is None):
-        if report is None:
+        if not self.reportRate.observe(report is not None):
             report = self.createReport(auditors, guardInfo)
             self.putReport(auditors, guardInfo, report)
         return report
@@ -5,24 +5,65 @@ frames with frames of Monte user-level code.
 
 from functools import wraps
 import inspect
+import os
 import os.path
 
 from rpython.rlib import rvmprof
 
 
+# The default sampling interval, in seconds.
+DEFAULT_INTERVAL = 0.00042
+
 profiledLocations = []
 
 def registerProfileTyphon():
     """
     Register all profiling locations.
 
-    Call this once from main.py, please.
+    profileTyphon() is disabled, so there are none and nothing calls this;
+    if it comes back, call this once after vmprof is first enabled.
     """
 
     for switch in profiledLocations:
         switch()
 
 
+class Profiler(object):
+    """
+    Start and stop vmprof, writing samples to a file.
+
+    Monte methods and matchers are registered with vmprof as they are
+    compiled, and their names are written out whenever profiling starts, so
+    the profiler may be started and stopped at any point. The output is in
+    vmprof's format.
+    """
+
+    fd = -1
+
+    def isRunning(self):
+        return self.fd >= 0
+
+    def start(self, path, interval):
+        if self.isRunning():
+            raise rvmprof.VMProfError("Profiler is already running")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0644)
+        try:
+            rvmprof.enable(fd, interval)
+        except rvmprof.VMProfError:
+            os.close(fd)
+            raise
+        self.fd = fd
+
+    def stop(self):
+        if not self.isRunning():
+            raise rvmprof.VMProfError("Profiler is not running")
+        rvmprof.disable()
+        os.close(self.fd)
+        self.fd = -1
+
+profiler = Profiler()
+
+
 def profileTyphon(name):
     """
     A decorator to cause this method's frames to show up in vmprof logs.
@@ -21,11 +21,13 @@ from rpython.rlib.rerased import new_erasing_pair
 from rpython.rtyper.lltypesystem import lltype, rffi
 from rpython.rtyper.tool import rffi_platform
 from rpython.translator.tool.cbuild import ExternalCompilationInfo
-from typhon.log import log
+from typhon.log import log, tagMask, wants
 
 from typhon.futures import Ok, ERR
 from typhon.objects.root import Object
 
+UV = tagMask(["uv"])
+
 
 class UVError(Exception):
     """
@@ -242,17 +244,19 @@ def stashFor(name, struct, initial=None):
         # uv_t = rffi.cast(struct, uv_t)
         index = theStash.put(obj)
         uv_t.c_data = rffi.cast(rffi.VOIDP, index)
-        log(["uv"], u"Stash %s: Storing 0x%x to %d (0x%x)" %
-                    (name.decode("utf-8"), current_object_addr_as_int(obj),
-                     intmask(index), current_object_addr_as_int(uv_t)))
+        if wants(UV):
+            log(["uv"], u"Stash %s: Storing 0x%x to %d (0x%x)" %
+                        (name.decode("utf-8"), current_object_addr_as_int(obj),
+                         intmask(index), current_object_addr_as_int(uv_t)))
 
     def unstash(uv_t):
         # uv_t = rffi.cast(struct, uv_t)
         index = rffi.cast(rffi.INT, uv_t.c_data)
         obj = theStash.get(index)
-        log(["uv"], u"Stash %s: Getting 0x%x from %d (0x%x)" %
-                    (name.decode("utf-8"), current_object_addr_as_int(obj),
-                     intmask(index), current_object_addr_as_int(uv_t)))
+        if wants(UV):
+            log(["uv"], u"Stash %s: Getting 0x%x from %d (0x%x)" %
+                        (name.decode("utf-8"), current_object_addr_as_int(obj),
+                         intmask(index), current_object_addr_as_int(uv_t)))
         return obj
 
     class unstashing(object):
@@ -345,9 +349,45 @@ def freeBuf(buf):
     free(buf)
 
 
+class BufferPool(object):
+    """
+    A bounded free list of raw read buffers.
+
+    libuv asks for the same size of buffer on nearly every read, so buffers
+    are kept for reuse instead of being freed. Buffers of any other size are
+    not pooled.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.size = 0
+        self.buffers = []
+
+    def take(self, size):
+        if size == self.size and self.buffers:
+            return self.buffers.pop()
+        return alloc_raw_storage(size)
+
+    def give(self, base, size):
+        if not base:
+            return
+        if size != self.size:
+            # The preferred size changed; the old buffers won't be wanted.
+            for buf in self.buffers:
+                free_raw_storage(buf)
+            del self.buffers[:]
+            self.size = size
+        if len(self.buffers) < self.limit:
+            self.buffers.append(base)
+        else:
+            free_raw_storage(base)
+
+readBuffers = BufferPool(16)
+
+
 def allocCB(handle, size, buf):
     # This is almost certainly the right thing to pass to alloc_cb
-    buf.c_base = alloc_raw_storage(size)
+    buf.c_base = readBuffers.take(size)
     rffi.setintfield(buf, "c_len", size)
 
 
@@ -369,6 +409,13 @@ def readStreamCB(stream, status, buf):
     # We only restash in the success case, not the error cases.
     state, v = unstashStream2(stream)
     k = streamReadStart_unerase(v)
+    if status > 0:
+        data = rffi.charpsize2str(buf[0].c_base, status)
+    else:
+        data = ""
+    # The data has been copied out, so the buffer can go back to the pool
+    # whether or not anybody wanted it.
+    readBuffers.give(buf[0].c_base, intmask(buf[0].c_len))
     if not k:
         return
     if status == 0:
@@ -378,7 +425,6 @@ def readStreamCB(stream, status, buf):
     # reading again.
     readStop(stream)
     if status > 0:
-        data = rffi.charpsize2str(buf[0].c_base, status)
         k.do(state, Ok(data))
     elif status == -4095:
         k.do(state, Ok(""))
@@ -424,6 +470,40 @@ class magic_write(object):
         stashWrite2(uv_write, (state, sb))
         write(uv_write, self.stream, bufs, 1, writeStreamCB)
 
+stashWritev2, unstashWritev2, _ = stashFor("writev", write_tp)
+
+
+def writevStreamCB(uv_write, status):
+    state, sb = unstashWritev2(uv_write)
+    sb.deallocate()
+    status = intmask(status)
+    if status < 0:
+        sb.k.do(state, (ERR, 0, formatError(status).decode("utf-8")))
+    else:
+        sb.k.do(state, Ok(sb.size))
+
+
+class magic_writev(object):
+    """
+    Write several bytestrings to a stream with a single request.
+
+    The callback receives the total number of bytes written.
+    """
+
+    callbackType = StreamWriteFutureCallback
+
+    def __init__(self, stream, datas):
+        self.stream = stream
+        self.datas = datas
+
+    def run(self, state, k):
+        uv_write = alloc_write()
+        sb = WritevBuf(self.datas, k)
+        bufs = sb.allocate()
+        stashWritev2(uv_write, (state, sb))
+        write(uv_write, self.stream, bufs, len(self.datas), writevStreamCB)
+
+
 class scopedBufs(Object):
 
     def __init__(self, data, obj):
@@ -567,7 +647,8 @@ class StreamJanitor(object):
         if not self.streams:
             return
 
-        log(["uv"], u"Janitor closing %d streams" % len(self.streams))
+        if wants(UV):
+            log(["uv"], u"Janitor closing %d streams" % len(self.streams))
         for stream in self.streams:
             closeAndFree(stream)
         self.streams = []
@@ -840,6 +921,10 @@ def alloc_pipe(loop):
     check("pipe_init", pipe_init(loop, pipe, 0))
     return pipe
 
+pipe_open = rffi.llexternal("uv_pipe_open", [pipe_tp, rffi.INT], rffi.INT,
+                            compilation_info=eci)
+pipeOpen = checking("pipe_open", pipe_open)
+
 
 TTY_MODE_NORMAL = 0x0
 TTY_MODE_RAW = 0x1
@@ -975,6 +1060,17 @@ class WriteBuf(scopedBufs):
         self.scoping = lltype.scoped_alloc(rffi.CArray(buf_t), len(self.data))
 
 
+class WritevBuf(scopedBufs):
+    def __init__(self, datas, k):
+        self.data = datas
+        self.k = k
+        size = 0
+        for datum in datas:
+            size += len(datum)
+        self.size = size
+        self.scoping = lltype.scoped_alloc(rffi.CArray(buf_t), len(self.data))
+
+
 class magic_fsWrite(object):
     callbackType = FSWriteFutureCallback
     def __init__(self, vat, fd, data):
@@ -19,13 +19,13 @@ from typhon.errors import userError
 from typhon.importing import AstModule, obtainModule
 from typhon.load.nano import loadMASTBytes as realLoad
 from typhon.nano.mast import ASTWrapper, theASTBuilder
-from typhon.nano.interp import (evalToPair as astEvalToPair,
+from typhon.nano.interp import (evalToPair as astEvalToPair, extendScope,
                                 scope2env)
 from typhon.nodes import kernelAstStamp
 from typhon.objects.auditors import (deepFrozenStamp, semitransparentStamp,
                                      transparentStamp)
 from typhon.objects.collections.lists import ConstList
-from typhon.objects.collections.maps import ConstMap
+from typhon.objects.collections.maps import ConstMap, unwrapMap
 from typhon.objects.collections.sets import ConstSet
 from typhon.objects.data import unwrapBytes, wrapBool
 from typhon.objects.guards import (BoolGuard, BytesGuard, CharGuard,
@@ -134,9 +134,16 @@ class AstEval0(Object):
     @method("List", "Any", "Any", inRepl="Bool", filename="Str")
     @profileTyphon("astEval.evalToPair/2")
     def evalToPair(self, bs, scope, inRepl=False, filename=u"<eval>"):
-        ast = realLoad(unwrapBytes(bs), filename)
-        result, envMap = astEvalToPair(ast, scope, filename, inRepl)
-        return [result, envMap]
+        if inRepl:
+            # REPL lines are rarely repeated, so they aren't worth caching.
+            ast = realLoad(unwrapBytes(bs), filename)
+            result, envMap = astEvalToPair(ast, scope, filename, inRepl)
+            return [result, envMap]
+        mod = AstModule(self.recorder, filename)
+        mod.load(unwrapBytes(bs))
+        d = unwrapMap(scope)
+        result, topLocals = mod.eval(scope2env(d))
+        return [result, extendScope(d, topLocals)]
 
 
 def bootScope(paths, recorder):
@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+from rpython.rlib.rarithmetic import LONG_BIT
+
+from typhon.load.nano import (MAGIC, MAX_SMALL_SHIFT, InvalidMAST,
+                              MASTStream, loadMASTBytes)
+
+
+def varint(i):
+    bs = []
+    while True:
+        b = i & 0x7f
+        i >>= 7
+        if i:
+            bs.append(chr(b | 0x80))
+        else:
+            bs.append(chr(b))
+            return "".join(bs)
+
+
+def zigzag(i):
+    return i * 2 if i >= 0 else -i * 2 - 1
+
+
+def stream(bs):
+    return MASTStream(bs, False, u"<test>")
+
+
+# Values on either side of where varints stop fitting into machine ints.
+BOUNDARY = [2 ** (MAX_SMALL_SHIFT + 7) + d for d in (-1, 0, 1)] + [
+    2 ** (LONG_BIT - 1) + d for d in (-1, 0, 1)] + [
+    2 ** LONG_BIT - 1, 2 ** LONG_BIT, 2 ** 100]
+
+
+class TestVarInt(TestCase):
+
+    def testSmall(self):
+        for i in [0, 1, 127, 128, 300, 2 ** 32]:
+            self.assertEqual(stream(varint(i)).nextVarInt().tolong(), i)
+
+    def testBoundary(self):
+        for i in BOUNDARY:
+            self.assertEqual(stream(varint(i)).nextVarInt().tolong(), i)
+
+    def testNextIntBoundary(self):
+        for i in BOUNDARY:
+            s = stream(varint(i))
+            if i < 2 ** (LONG_BIT - 1):
+                self.assertEqual(s.nextInt(), i)
+            else:
+                self.assertRaises(InvalidMAST, s.nextInt)
+
+    def testConsumesOnlyItself(self):
+        for i in [0, 300] + BOUNDARY:
+            s = stream(varint(i) + "\x05")
+            s.nextVarInt()
+            self.assertEqual(ord(s.nextByte()), 5)
+            self.assertTrue(s.exhausted())
+
+    def testUnderrun(self):
+        self.assertRaises(InvalidMAST, stream("\x80\x80").nextVarInt)
+
+
+class TestIntLiteral(TestCase):
+
+    def decode(self, i):
+        bs = MAGIC + "\x00" + "LI" + varint(zigzag(i))
+        return loadMASTBytes(bs, u"<test>").i.tolong()
+
+    def testSmall(self):
+        for i in [0, 1, -1, 63, -64, 64, -65, 2 ** 40, -2 ** 40]:
+            self.assertEqual(self.decode(i), i)
+
+    def testBoundary(self):
+        for i in BOUNDARY:
+            # Zigzagging doubles magnitudes, so halve to land on the edge.
+            for j in [i // 2, i // 2 + 1, -(i // 2), -(i // 2) - 1]:
+                self.assertEqual(self.decode(j), j)
@@ -0,0 +1,237 @@
+from unittest import TestCase
+
+from rpython.rlib.rbigint import rbigint
+
+from typhon.nano.escapes import LocalizeEscapes, elideEscapes
+from typhon.nano.interp import evalMonte
+from typhon.nano.mast import MastIR as M, saveScripts
+from typhon.nano.scopes import BoundNounsIR, bindNouns, layoutScopes
+from typhon.nano.slots import recoverSlots
+from typhon.objects.constants import NullObject, wrapBool
+from typhon.objects.guards import anyGuard
+from typhon.objects.root import tieMirandaKnot
+from typhon.objects.slots import finalBinding
+from typhon.spans import Span
+
+# main.py does this at startup; interpreted methods need FAIL.
+tieMirandaKnot()
+
+SPAN = Span(u"<test>", True, 1, 0, 1, 1)
+NULL = M.NullExpr(SPAN)
+TRUE = M.NounExpr(u"true", SPAN)
+
+
+def intExpr(i):
+    return M.IntExpr(rbigint.fromint(i), SPAN)
+
+def noun(name):
+    return M.NounExpr(name, SPAN)
+
+def finalPatt(name, guard=NULL):
+    return M.FinalPatt(name, guard, SPAN)
+
+def call(obj, verb, args):
+    return M.CallExpr(obj, verb, args, [], SPAN)
+
+def get(obj):
+    return call(obj, u"get", [])
+
+def seq(*exprs):
+    return M.SeqExpr(list(exprs), SPAN)
+
+def ifTrue(cons):
+    return M.IfExpr(TRUE, cons, NULL, SPAN)
+
+def escape(name, body, guard=NULL):
+    return M.EscapeOnlyExpr(finalPatt(name, guard), body, SPAN)
+
+def fire(ej, *args):
+    """
+    escape ej { if (true) { <ej>.run(args) }; 0 }
+
+    The ejection isn't in tail position, so method returns can't elide it.
+    """
+    return escape(u"ej", seq(ifTrue(call(ej, u"run", list(args))),
+                             intExpr(0)))
+
+def lower(expr):
+    ll, _, _, _ = layoutScopes(recoverSlots(saveScripts(expr)),
+                               [u"true", u"Any"], u"test", False)
+    return elideEscapes(bindNouns(ll))
+
+def evaluate(expr):
+    env = {u"true": finalBinding(wrapBool(True), anyGuard),
+           u"Any": finalBinding(anyGuard, anyGuard)}
+    return evalMonte(expr, env, u"test", False)[0]
+
+
+class TestLocalizeEscapes(TestCase):
+
+    def assertLocal(self, expr):
+        self.assertTrue(isinstance(lower(expr),
+                                   BoundNounsIR.LocalEscapeOnlyExpr))
+
+    def assertReified(self, expr):
+        self.assertTrue(isinstance(lower(expr), BoundNounsIR.EscapeOnlyExpr))
+
+    def testNoun(self):
+        self.assertLocal(fire(noun(u"ej"), intExpr(1)))
+
+    def testNoArgs(self):
+        self.assertLocal(fire(noun(u"ej")))
+
+    def testBinding(self):
+        self.assertLocal(fire(get(get(M.BindingExpr(u"ej", SPAN))),
+                              intExpr(1)))
+
+    def testLoweredFirings(self):
+        body = lower(fire(noun(u"ej"), intExpr(1))).body
+        eject = body.exprs[0].cons
+        self.assertTrue(isinstance(eject, BoundNounsIR.LocalEjectExpr))
+
+    def testGuarded(self):
+        self.assertReified(escape(u"ej", seq(
+            ifTrue(call(noun(u"ej"), u"run", [intExpr(1)])), intExpr(0)),
+            guard=noun(u"Any")))
+
+    def testPassed(self):
+        self.assertReified(fire(noun(u"ej"), noun(u"ej")))
+
+    def testPassedToOther(self):
+        self.assertReified(escape(u"ej", seq(
+            ifTrue(call(noun(u"true"), u"pick", [noun(u"ej")])),
+            intExpr(0))))
+
+    def testBareBinding(self):
+        self.assertReified(escape(u"ej", seq(M.BindingExpr(u"ej", SPAN),
+                                             intExpr(0))))
+
+    def testDefExit(self):
+        self.assertReified(escape(u"ej", seq(
+            M.DefExpr(finalPatt(u"x"), noun(u"ej"), intExpr(1), SPAN),
+            intExpr(0))))
+
+    def testCaptured(self):
+        method = M.MethodExpr(None, u"run", [], [], NULL,
+                              call(noun(u"ej"), u"run", [intExpr(1)]), SPAN)
+        obj = M.ObjectExpr(None, finalPatt(u"o"), [], [method], [], SPAN)
+        self.assertReified(escape(u"ej", seq(obj, intExpr(0))))
+
+    def testOtherFirings(self):
+        # Firing with two arguments isn't a plain ejection.
+        self.assertReified(fire(noun(u"ej"), intExpr(1), intExpr(2)))
+
+
+class TestLocalizeSlots(TestCase):
+    """
+    Final slots are only reified for guards, which stop localization, so
+    these are built by hand.
+    """
+
+    def escape(self, fired, guard=None):
+        B = BoundNounsIR
+        if guard is None:
+            guard = B.NullExpr(SPAN)
+        ej = B.LocalExpr(u"ej", 0, SPAN)
+        cond = B.LocalExpr(u"c", 1, SPAN)
+        firing = B.CallExpr(fired(ej), u"run", [B.NullExpr(SPAN)], [], SPAN)
+        body = B.SeqExpr([B.IfExpr(cond, firing, B.NullExpr(SPAN), SPAN),
+                          B.NullExpr(SPAN)], SPAN)
+        patt = B.FinalSlotPatt(u"ej", guard, 0, SPAN)
+        return LocalizeEscapes().visitExpr(B.EscapeOnlyExpr(patt, body, SPAN))
+
+    def unwrap(self, ej):
+        return BoundNounsIR.CallExpr(ej, u"get", [], [], SPAN)
+
+    def testSlot(self):
+        result = self.escape(self.unwrap)
+        self.assertTrue(isinstance(result, BoundNounsIR.LocalEscapeOnlyExpr))
+        eject = result.body.exprs[0].cons
+        self.assertTrue(isinstance(eject, BoundNounsIR.LocalEjectExpr))
+
+    def testSlotUnwrapped(self):
+        # Firing the slot itself isn't firing the ejector.
+        result = self.escape(lambda ej: ej)
+        self.assertTrue(isinstance(result, BoundNounsIR.EscapeOnlyExpr))
+
+    def testSlotOverwrapped(self):
+        result = self.escape(lambda ej: self.unwrap(self.unwrap(ej)))
+        self.assertTrue(isinstance(result, BoundNounsIR.EscapeOnlyExpr))
+
+    def testSlotGuarded(self):
+        guard = BoundNounsIR.LocalExpr(u"c", 1, SPAN)
+        result = self.escape(self.unwrap, guard)
+        self.assertTrue(isinstance(result, BoundNounsIR.EscapeOnlyExpr))
+
+
+class TestEvalLocalEscapes(TestCase):
+
+    def assertEvaluates(self, expr, i):
+        self.assertEqual(evaluate(expr).getInt(), i)
+
+    def testNoun(self):
+        self.assertEvaluates(fire(noun(u"ej"), intExpr(1)), 1)
+
+    def testNoArgs(self):
+        self.assertIs(evaluate(fire(noun(u"ej"))), NullObject)
+
+    def testBinding(self):
+        self.assertEvaluates(fire(get(get(M.BindingExpr(u"ej", SPAN))),
+                                  intExpr(1)), 1)
+
+    def testNotFired(self):
+        self.assertEvaluates(escape(u"ej", seq(
+            M.IfExpr(TRUE, NULL, call(noun(u"ej"), u"run", [intExpr(1)]),
+                     SPAN),
+            intExpr(2))), 2)
+
+    def testCatch(self):
+        expr = M.EscapeExpr(finalPatt(u"ej"), seq(
+            ifTrue(call(noun(u"ej"), u"run", [intExpr(3)])), intExpr(4)),
+            finalPatt(u"x"), call(noun(u"x"), u"add", [intExpr(1)]), SPAN)
+        self.assertEvaluates(expr, 4)
+
+    def testNestedOuter(self):
+        # escape a { escape b { if (true) { a(5) } else { b() }; 6 }; 7 }
+        inner = M.EscapeOnlyExpr(finalPatt(u"b"), seq(
+            M.IfExpr(TRUE, call(noun(u"a"), u"run", [intExpr(5)]),
+                     call(noun(u"b"), u"run", []), SPAN),
+            intExpr(6)), SPAN)
+        outer = escape(u"a", seq(inner, intExpr(7)))
+        self.assertTrue(isinstance(lower(outer).body.exprs[0],
+                                   BoundNounsIR.LocalEscapeOnlyExpr))
+        self.assertEvaluates(outer, 5)
+
+    def testNestedInner(self):
+        # escape a { escape b { if (true) { b(5) }; 6 }; 7 }
+        inner = M.EscapeOnlyExpr(finalPatt(u"b"), seq(
+            ifTrue(call(noun(u"b"), u"run", [intExpr(5)])), intExpr(6)),
+            SPAN)
+        outer = escape(u"a", seq(
+            ifTrue(call(noun(u"a"), u"run", [inner])), intExpr(7)))
+        self.assertEvaluates(outer, 5)
+
+    def testTryCatch(self):
+        # escape ej { try { if (true) { ej(1) }; 2 } catch _ { 3 } }
+        body = M.TryExpr(seq(ifTrue(call(noun(u"ej"), u"run",
+                                         [intExpr(1)])), intExpr(2)),
+                         M.IgnorePatt(NULL, SPAN), intExpr(3), SPAN)
+        expr = escape(u"ej", body)
+        self.assertTrue(isinstance(lower(expr),
+                                   BoundNounsIR.LocalEscapeOnlyExpr))
+        self.assertEvaluates(expr, 1)
+
+    def testTryFinally(self):
+        # escape outer { try { outer(1) } finally { escape inner { inner(2) } } }
+        inner = M.EscapeOnlyExpr(finalPatt(u"inner"),
+                                 call(noun(u"inner"), u"run", [intExpr(2)]),
+                                 SPAN)
+        body = M.FinallyExpr(call(noun(u"outer"), u"run", [intExpr(1)]),
+                             inner, SPAN)
+        expr = M.EscapeOnlyExpr(finalPatt(u"outer"), body, SPAN)
+        self.assertTrue(isinstance(lower(expr),
+                                   BoundNounsIR.LocalEscapeOnlyExpr))
+        self.assertEvaluates(expr, 1)
+
+    def testReified(self):
+        self.assertTrue(evaluate(fire(noun(u"ej"), noun(u"ej"))) is not None)
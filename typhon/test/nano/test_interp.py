@@ -0,0 +1,163 @@
+from unittest import TestCase
+
+from rpython.rlib.rbigint import rbigint
+
+from typhon.atoms import getAtom
+from typhon.errors import Refused
+from typhon.metrics import hotRates
+from typhon.nano.interp import (InterpObject, declaredMethodRate, evalMonte,
+                                lookupMethod, theEvaluator)
+from typhon.nano.mast import MastIR as M
+from typhon.objects.collections.maps import EMPTY_MAP
+from typhon.objects.data import IntObject, StrObject
+from typhon.objects.root import tieMirandaKnot
+from typhon.spans import Span
+
+# main.py does this at startup; interpreted methods need FAIL.
+tieMirandaKnot()
+
+SPAN = Span(u"<test>", True, 1, 0, 1, 1)
+NULL = M.NullExpr(SPAN)
+
+FOO_0 = getAtom(u"foo", 0)
+BAR_1 = getAtom(u"bar", 1)
+BAZ_0 = getAtom(u"baz", 0)
+
+
+def intExpr(i):
+    return M.IntExpr(rbigint.fromint(i), SPAN)
+
+def finalPatt(name):
+    return M.FinalPatt(name, NULL, SPAN)
+
+def methodExpr(verb, params, body):
+    return M.MethodExpr(None, verb, [finalPatt(p) for p in params], [],
+                        NULL, body, SPAN)
+
+def objectExpr(methods, matchers):
+    return M.ObjectExpr(None, finalPatt(u"obj"), [], methods, matchers, SPAN)
+
+def evalObject(methods, matchers):
+    obj = evalMonte(objectExpr(methods, matchers), {}, u"test", False)[0]
+    assert isinstance(obj, InterpObject)
+    return obj
+
+def scanMethods(script, atom):
+    # The linear scan which the method table replaced.
+    for method in script.methods:
+        if method.atom is atom:
+            return method
+    return None
+
+
+class TestMethodTable(TestCase):
+
+    def setUp(self):
+        self.obj = evalObject([
+            methodExpr(u"foo", [], intExpr(1)),
+            methodExpr(u"bar", [u"x"], M.NounExpr(u"x", SPAN)),
+            # Shadowed by the first foo/0.
+            methodExpr(u"foo", [], intExpr(2)),
+        ], [])
+
+    def testMatchesScan(self):
+        script = self.obj.script
+        for atom in [FOO_0, BAR_1, BAZ_0, getAtom(u"foo", 1)]:
+            self.assertIs(lookupMethod(script, atom),
+                          scanMethods(script, atom))
+            self.assertIs(self.obj.getMethod(atom), scanMethods(script, atom))
+
+    def testFirstMethodWins(self):
+        result = self.obj.callAtom(FOO_0, [], EMPTY_MAP)
+        self.assertEqual(result.getInt(), 1)
+
+    def testCall(self):
+        result = self.obj.callAtom(BAR_1, [IntObject(5)], EMPTY_MAP)
+        self.assertEqual(result.getInt(), 5)
+
+    def testMiranda(self):
+        self.assertIs(self.obj.getMethod(getAtom(u"_respondsTo", 2)), None)
+        result = self.obj.call(u"_respondsTo", [StrObject(u"bar"),
+                                                IntObject(1)])
+        self.assertTrue(result.isTrue())
+
+    def testRefused(self):
+        self.assertRaises(Refused, self.obj.callAtom, BAZ_0, [], EMPTY_MAP)
+
+    def testRateOff(self):
+        total = declaredMethodRate.total
+        self.obj.getMethod(FOO_0)
+        self.assertEqual(declaredMethodRate.total, total)
+
+    def testRateOn(self):
+        total = declaredMethodRate.total
+        success = declaredMethodRate.success
+        hotRates.start()
+        try:
+            self.obj.getMethod(FOO_0)
+            self.obj.getMethod(BAZ_0)
+        finally:
+            hotRates.stop()
+        self.assertEqual(declaredMethodRate.total, total + 2)
+        self.assertEqual(declaredMethodRate.success, success + 1)
+
+
+class TestMatcherOnly(TestCase):
+
+    def setUp(self):
+        self.obj = evalObject([], [
+            M.MatcherExpr(M.IgnorePatt(NULL, SPAN), intExpr(42), SPAN),
+        ])
+
+    def testMatchesScan(self):
+        script = self.obj.script
+        self.assertEqual(script.methodTable, {})
+        for atom in [FOO_0, BAR_1]:
+            self.assertIs(lookupMethod(script, atom), None)
+            self.assertIs(scanMethods(script, atom), None)
+
+    def testMatcher(self):
+        result = self.obj.callAtom(BAR_1, [IntObject(5)], EMPTY_MAP)
+        self.assertEqual(result.getInt(), 42)
+
+
+class TestSharedEvaluator(TestCase):
+
+    def setUp(self):
+        obj = M.NounExpr(u"obj", SPAN)
+        x = M.NounExpr(u"x", SPAN)
+        self.obj = evalObject([
+            methodExpr(u"foo", [], intExpr(1)),
+            # obj.foo(); x
+            methodExpr(u"bar", [u"x"], M.SeqExpr([
+                M.CallExpr(obj, u"foo", [], [], SPAN), x], SPAN)),
+            # x.boom()
+            methodExpr(u"boom", [u"x"], M.CallExpr(x, u"boom", [], [],
+                                                   SPAN)),
+        ], [
+            # The matcher calls back into a method.
+            M.MatcherExpr(M.IgnorePatt(NULL, SPAN),
+                          M.CallExpr(obj, u"bar", [intExpr(7)], [], SPAN),
+                          SPAN),
+        ])
+        self.activation = theEvaluator.locals, theEvaluator.frame
+
+    def assertLeft(self):
+        self.assertIs(theEvaluator.locals, self.activation[0])
+        self.assertIs(theEvaluator.frame, self.activation[1])
+
+    def testNested(self):
+        # The nested call to foo/0 doesn't clobber bar/1's locals.
+        result = self.obj.callAtom(BAR_1, [IntObject(5)], EMPTY_MAP)
+        self.assertEqual(result.getInt(), 5)
+        self.assertLeft()
+
+    def testMatcher(self):
+        result = self.obj.callAtom(BAZ_0, [], EMPTY_MAP)
+        self.assertEqual(result.getInt(), 7)
+        self.assertLeft()
+
+    def testLeftOnError(self):
+        self.assertRaises(Refused, self.obj.callAtom,
+                          getAtom(u"boom", 1), [IntObject(5)], EMPTY_MAP)
+        self.assertLeft()
@@ -18,9 +18,13 @@ from unittest import TestCase
 
 from typhon.errors import UserException
 from typhon.objects.collections.lists import wrapList, FlexList, unwrapList
-from typhon.objects.collections.maps import ConstMap, monteMap
+from typhon.objects.collections.maps import (ConstMap, FAIL_KEY, monteMap,
+                                             withMirandaFail)
 from typhon.objects.collections.sets import ConstSet, monteSet
-from typhon.objects.data import CharObject, IntObject
+from typhon.objects.data import (BytesObject, CharObject, IntObject,
+                                 StrObject)
+from typhon.objects.refs import makePromise
+from typhon.vats import scopedVat, testingVat
 
 
 class TestConstMap(TestCase):
@@ -32,6 +36,14 @@ class TestConstMap(TestCase):
         self.assertTrue(m.contains(IntObject(42)))
         self.assertFalse(m.contains(IntObject(7)))
 
+    def testContainsStrKeys(self):
+        d = monteMap()
+        d[StrObject(u"42")] = IntObject(5)
+        m = ConstMap(d)
+        self.assertTrue(m.contains(StrObject(u"42")))
+        self.assertFalse(m.contains(IntObject(42)))
+        self.assertFalse(m.contains(BytesObject("42")))
+
     def testToString(self):
         d = monteMap()
         self.assertEqual(ConstMap(d).toString(), u"[].asMap()")
@@ -46,6 +58,50 @@ class TestConstMap(TestCase):
         self.assertEqual(result.getInt(), 2)
 
 
+    def testIsSettledCaches(self):
+        with scopedVat(testingVat()):
+            p, r = makePromise()
+            d = monteMap()
+            d[IntObject(1)] = wrapList([p])
+            m = ConstMap(d)
+            self.assertFalse(m.isSettled())
+            self.assertFalse(m._isSettled)
+            r.resolve(IntObject(2))
+            self.assertTrue(m.isSettled())
+            self.assertTrue(m._isSettled)
+
+    def testWithMirandaFail(self):
+        d = monteMap()
+        d[IntObject(42)] = IntObject(5)
+        m = withMirandaFail(ConstMap(d), IntObject(7))
+        self.assertEqual(m.objectMap[FAIL_KEY].getInt(), 7)
+        self.assertFalse(FAIL_KEY in d)
+
+    def testWithMirandaFailPresent(self):
+        d = monteMap()
+        d[FAIL_KEY] = IntObject(5)
+        m = ConstMap(d)
+        self.assertTrue(withMirandaFail(m, IntObject(7)) is m)
+
+    def testWithChain(self):
+        m = ConstMap(monteMap())
+        for i in range(5):
+            m = m.call(u"with", [IntObject(i), IntObject(i * 2)])
+        m = m.call(u"with", [IntObject(1), IntObject(7)])
+        m = m.call(u"without", [IntObject(3)])
+        self.assertEqual(m.objectMap, None)
+        keys = [k.getInt() for k in m.getMap().keys()]
+        self.assertEqual(keys, [0, 1, 2, 4])
+        self.assertEqual(m.call(u"get", [IntObject(1)]).getInt(), 7)
+
+    def testWithoutLeavesParent(self):
+        d = monteMap()
+        d[IntObject(1)] = IntObject(2)
+        m = ConstMap(d)
+        m.call(u"without", [IntObject(1)]).call(u"size", [])
+        self.assertTrue(m.contains(IntObject(1)))
+
+
 class TestwrapList(TestCase):
 
     def testCmpShortLeft(self):
@@ -60,6 +116,16 @@ class TestwrapList(TestCase):
         result = a.call(u"op__cmp", [b])
         self.assertEqual(result.getInt(), 1)
 
+    def testWithChain(self):
+        l = wrapList([IntObject(0)])
+        for i in range(1, 4):
+            l = l.call(u"with", [IntObject(i)])
+        l = l.call(u"add", [wrapList([IntObject(4), IntObject(5)])])
+        self.assertEqual(l.objs, None)
+        self.assertEqual(l.call(u"size", []).getInt(), 6)
+        self.assertEqual(l.call(u"last", []).getInt(), 5)
+        self.assertEqual([i.getInt() for i in unwrapList(l)], range(6))
+
     def testGetNegative(self):
         l = wrapList([])
         self.assertRaises(UserException, l.call, u"get", [IntObject(-1)])
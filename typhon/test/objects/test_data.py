@@ -21,11 +21,24 @@ from rpython.rlib.rbigint import rbigint
 
 from typhon.errors import Ejecting, UserException
 from typhon.objects.collections.lists import wrapList, unwrapList
-from typhon.objects.data import (BigInt, CharObject, DoubleObject, IntObject,
-                                 StrObject)
+from typhon.objects.data import (ROPE_THRESHOLD, BigInt, CharObject,
+                                 DoubleObject, IntObject, StrObject)
 from typhon.objects.ejectors import Ejector
 
 
+def countLeaves(rope):
+    leaves = 0
+    stack = [rope]
+    while stack:
+        node = stack.pop()
+        if node._s is None:
+            stack.append(node._left)
+            stack.append(node._right)
+        else:
+            leaves += 1
+    return leaves
+
+
 class TestCharObject(TestCase):
 
     def testAdd(self):
@@ -213,6 +226,42 @@ class TestStr(TestCase):
         result = s.call(u"trim", [])
         self.assertEqual(result._s, u"testing")
 
+    def testAddRope(self):
+        left = StrObject(u"a" * ROPE_THRESHOLD)
+        right = StrObject(u"b" * ROPE_THRESHOLD)
+        result = left.call(u"add", [right]).call(u"add", [left])
+        self.assertEqual(result._s, None)
+        self.assertEqual(result.call(u"size", []).getInt(),
+                         3 * ROPE_THRESHOLD)
+        flat = u"a" * ROPE_THRESHOLD + u"b" * ROPE_THRESHOLD
+        flat += u"a" * ROPE_THRESHOLD
+        self.assertEqual(result.computeHash(0),
+                         StrObject(flat).computeHash(0))
+        self.assertEqual(result.getString(), flat)
+
+    def testAddShort(self):
+        result = StrObject(u"a").call(u"add", [StrObject(u"b")])
+        self.assertEqual(result._s, u"ab")
+
+    def testWithRope(self):
+        result = StrObject(u"")
+        for i in range(3 * ROPE_THRESHOLD):
+            result = result.call(u"with", [CharObject(u"x")])
+        self.assertEqual(result._s, None)
+        self.assertEqual(result.call(u"size", []).getInt(),
+                         3 * ROPE_THRESHOLD)
+        # Appended characters are folded into leaves, not kept one apiece.
+        self.assertTrue(countLeaves(result) <= 4)
+        self.assertEqual(result.getString(), u"x" * (3 * ROPE_THRESHOLD))
+
+    def testAddCharRope(self):
+        result = StrObject(u"a" * ROPE_THRESHOLD)
+        for i in range(ROPE_THRESHOLD):
+            result = result.call(u"add", [CharObject(u"b")])
+        self.assertTrue(countLeaves(result) <= 3)
+        self.assertEqual(result.getString(),
+                         u"a" * ROPE_THRESHOLD + u"b" * ROPE_THRESHOLD)
+
 
 
 class TestDouble(TestCase):
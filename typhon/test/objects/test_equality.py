@@ -0,0 +1,106 @@
+from unittest import TestCase
+
+from typhon.objects.collections.lists import wrapList
+from typhon.objects.data import (ROPE_THRESHOLD, BytesObject, IntObject,
+                                 StrObject)
+from typhon.objects.equality import EQUAL, INEQUAL, optSame, samenessFringe
+from typhon.objects.refs import makePromise
+from typhon.vats import scopedVat, testingVat
+
+
+def deepList(depth, leaf):
+    l = wrapList([leaf])
+    for i in range(depth):
+        l = wrapList([IntObject(i), l])
+    return l
+
+
+class TestOptSame(TestCase):
+
+    def testFlatLists(self):
+        first = wrapList([IntObject(1), StrObject(u"two")])
+        second = wrapList([IntObject(1), StrObject(u"two")])
+        self.assertIs(optSame(first, second), EQUAL)
+
+    def testFlatListsDiffer(self):
+        first = wrapList([IntObject(1), StrObject(u"two")])
+        second = wrapList([IntObject(1), StrObject(u"three")])
+        self.assertIs(optSame(first, second), INEQUAL)
+
+    def testDeepLists(self):
+        first = deepList(5000, IntObject(42))
+        second = deepList(5000, IntObject(42))
+        self.assertIs(optSame(first, second), EQUAL)
+
+    def testDeepListsDiffer(self):
+        first = deepList(5000, IntObject(42))
+        second = deepList(5000, IntObject(7))
+        self.assertIs(optSame(first, second), INEQUAL)
+
+    def testRopeStr(self):
+        half = u"a" * ROPE_THRESHOLD
+        rope = StrObject(half).call(u"add", [StrObject(half)])
+        self.assertIs(rope._s, None)
+        self.assertIs(optSame(rope, StrObject(half + half)), EQUAL)
+
+    def testRopeStrDiffers(self):
+        half = u"a" * ROPE_THRESHOLD
+        rope = StrObject(half).call(u"add", [StrObject(half)])
+        self.assertIs(optSame(rope, StrObject(half + u"b" * ROPE_THRESHOLD)),
+                      INEQUAL)
+        self.assertIs(optSame(rope, StrObject(half)), INEQUAL)
+
+    def testRopeBytes(self):
+        half = "a" * ROPE_THRESHOLD
+        rope = BytesObject(half).call(u"add", [BytesObject(half)])
+        self.assertIs(rope._bs, None)
+        self.assertIs(optSame(BytesObject(half + half), rope), EQUAL)
+
+    def testRopeBytesDiffers(self):
+        half = "a" * ROPE_THRESHOLD
+        rope = BytesObject(half).call(u"add", [BytesObject(half)])
+        self.assertIs(optSame(BytesObject(half + "b" * ROPE_THRESHOLD),
+                              rope), INEQUAL)
+
+
+def promise():
+    with scopedVat(testingVat()):
+        p, _ = makePromise()
+    return p
+
+
+class TestSamenessFringe(TestCase):
+
+    def testDeepSettled(self):
+        fringe = []
+        self.assertTrue(samenessFringe(deepList(5000, IntObject(42)), None,
+                                       fringe))
+        self.assertEqual(fringe, [])
+
+    def testDeepUnsettled(self):
+        p = promise()
+        fringe = []
+        self.assertFalse(samenessFringe(deepList(5000, p), None, fringe))
+        self.assertEqual(len(fringe), 1)
+        self.assertIs(fringe[0].identity, p)
+        # The innermost list holds the promise first, and every other list
+        # holds the next list second.
+        positions = []
+        path = fringe[0].path
+        while path is not None:
+            positions.append(path.position)
+            path = path.next
+        self.assertEqual(positions, [0] + [1] * 5000)
+
+    def testNoFringe(self):
+        p = promise()
+        self.assertFalse(samenessFringe(deepList(5000, p), None, None))
+
+    def testFringeOrder(self):
+        p1 = promise()
+        p2 = promise()
+        fringe = []
+        self.assertFalse(samenessFringe(wrapList([p1, IntObject(1), p2]),
+                                        None, fringe))
+        self.assertEqual([node.identity for node in fringe], [p1, p2])
+        self.assertEqual([node.path.position for node in fringe], [0, 2])
@@ -4,8 +4,10 @@ from unittest import TestCase
 
 from rpython.rlib.rbigint import rbigint
 
+from typhon.objects.collections.lists import unwrapList
 from typhon.objects.data import BytesObject, IntObject, StrObject
-from typhon.objects.makers import theMakeInt
+from typhon.objects.makers import (decodeUTF8, encodeUTF8, theMakeInt,
+        theMakeStr)
 
 class TestMakeInt(TestCase):
 
@@ -34,3 +36,30 @@ class TestMakeInt(TestCase):
         s = StrObject(u"100_000")
         result = theMakeInt.call(u"run", [s])
         self.assertEqual(result.getInt(), 100000)
+
+
+class TestUTF8(TestCase):
+
+    def testDecode(self):
+        s, offset = decodeUTF8(u"é⌵𝄞".encode("utf-8"))
+        self.assertEqual(s, u"é⌵𝄞")
+        self.assertEqual(offset, 9)
+
+    def testDecodeTruncated(self):
+        s, offset = decodeUTF8("a\xe2\x8c")
+        self.assertEqual(s, u"a")
+        self.assertEqual(offset, 1)
+
+    def testDecodeInvalid(self):
+        s, offset = decodeUTF8("a\xffb")
+        self.assertEqual(s, u"a\ufffdb")
+        self.assertEqual(offset, 3)
+
+    def testEncode(self):
+        self.assertEqual(encodeUTF8(u"é⌵𝄞"), u"é⌵𝄞".encode("utf-8"))
+
+    def testDecodeUTF8Remainder(self):
+        result = theMakeStr.call(u"decodeUTF8", [BytesObject("a\xe2")])
+        s, remainder = unwrapList(result)
+        self.assertEqual(s.getString(), u"a")
+        self.assertEqual(remainder.getBytes(), "\xe2")
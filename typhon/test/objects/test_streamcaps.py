@@ -0,0 +1,165 @@
+import os
+from unittest import TestCase
+
+from typhon import ruv
+from typhon.errors import UserException
+from typhon.futures import ERR, OK, Ok
+from typhon.objects.data import BytesObject, IntObject
+from typhon.objects.networking.streamcaps import (StreamSink,
+                                                  StreamSinkCleanup,
+                                                  StreamSinkFlush,
+                                                  StreamSinkFlushed)
+from typhon.objects.refs import isBroken, isResolved
+from typhon.vats import scopedVat, testingVat
+
+
+class ReleaseCounter(object):
+    """
+    Stands in for a ruv.UVStream, counting releases.
+    """
+
+    _stream = None
+    released = 0
+
+    def release(self):
+        self.released += 1
+
+
+class TestStreamSink(TestCase):
+
+    def setUp(self):
+        self.stream = ReleaseCounter()
+        self.vat = testingVat()
+        self.sink = StreamSink(self.stream, self.vat, budget=10)
+
+    def send(self, bs):
+        with scopedVat(self.vat):
+            return self.sink.call(u"run", [BytesObject(bs)])
+
+    def testRunQueuesOneFlush(self):
+        self.send("ab")
+        self.send("cd")
+        self.assertTrue(self.sink.flushing)
+        self.assertEqual(len(self.vat._callbacks), 1)
+        self.assertTrue(isinstance(self.vat._callbacks[0], StreamSinkFlush))
+
+    def testBatchWithinBudget(self):
+        for i in range(4):
+            self.send("abcd")
+        datas, resolvers = self.sink._takeBatch()
+        self.assertEqual(datas, ["abcd", "abcd"])
+        self.assertEqual(len(resolvers), 2)
+        datas, resolvers = self.sink._takeBatch()
+        self.assertEqual(datas, ["abcd", "abcd"])
+        self.assertEqual(self.sink._pending, [])
+
+    def testBatchOversized(self):
+        self.send("a" * 20)
+        self.send("b")
+        datas, _ = self.sink._takeBatch()
+        self.assertEqual(datas, ["a" * 20])
+        datas, _ = self.sink._takeBatch()
+        self.assertEqual(datas, ["b"])
+
+    def testSetWriteBudget(self):
+        budget = self.sink.call(u"getWriteBudget", [])
+        self.assertEqual(budget.getInt(), 10)
+        self.sink.call(u"setWriteBudget", [IntObject(2)])
+        self.assertRaises(UserException, self.sink.call, u"setWriteBudget",
+                          [IntObject(0)])
+        self.send("ab")
+        self.send("cd")
+        datas, _ = self.sink._takeBatch()
+        self.assertEqual(datas, ["ab"])
+
+    def testQueueUnbounded(self):
+        for i in range(4):
+            self.send("a" * 20)
+        self.assertEqual(len(self.sink._pending), 4)
+
+    def testFlushedResolves(self):
+        p = self.send("ab")
+        _, resolvers = self.sink._takeBatch()
+        StreamSinkFlushed(self.sink, resolvers).do(None, Ok(2))
+        self.assertTrue(isResolved(p))
+        self.assertFalse(isBroken(p))
+        self.assertFalse(self.sink.flushing)
+
+    def testFlushedSmashes(self):
+        p = self.send("ab")
+        _, resolvers = self.sink._takeBatch()
+        StreamSinkFlushed(self.sink, resolvers).do(None,
+                                                   (ERR, 0, u"broken pipe"))
+        self.assertTrue(isBroken(p))
+
+    def testFlushedFailureStops(self):
+        p1 = self.send("a" * 10)
+        p2 = self.send("b")
+        del self.vat._callbacks[:]
+        _, resolvers = self.sink._takeBatch()
+        StreamSinkFlushed(self.sink, resolvers).do(None,
+                                                   (ERR, 0, u"broken pipe"))
+        # The rest of the queue is smashed rather than written.
+        self.assertTrue(isBroken(p1))
+        self.assertTrue(isBroken(p2))
+        self.assertEqual(self.vat._callbacks, [])
+        self.assertFalse(self.sink.flushing)
+        self.assertEqual(self.stream.released, 1)
+        self.assertRaises(UserException, self.send, "c")
+        StreamSinkCleanup(self.sink).run()
+        self.assertEqual(self.stream.released, 1)
+
+    def testFlushedRequeues(self):
+        self.send("a" * 10)
+        self.send("b")
+        del self.vat._callbacks[:]
+        _, resolvers = self.sink._takeBatch()
+        StreamSinkFlushed(self.sink, resolvers).do(None, Ok(10))
+        # The rest of the queue gets another flush.
+        self.assertTrue(self.sink.flushing)
+        self.assertTrue(isinstance(self.vat._callbacks[0], StreamSinkFlush))
+
+    def testCloseWhileFlushing(self):
+        p = self.send("ab")
+        StreamSinkCleanup(self.sink).run()
+        self.assertTrue(self.sink.closed)
+        # The stream stays open until the queued packet is written.
+        self.assertEqual(self.stream.released, 0)
+        self.assertRaises(UserException, self.send, "cd")
+        _, resolvers = self.sink._takeBatch()
+        StreamSinkFlushed(self.sink, resolvers).do(None, Ok(2))
+        self.assertTrue(isResolved(p))
+        self.assertEqual(self.stream.released, 1)
+
+    def testCloseIdle(self):
+        StreamSinkCleanup(self.sink).run()
+        StreamSinkCleanup(self.sink).run()
+        self.assertEqual(self.stream.released, 1)
+
+
+class WriteResult(ruv.StreamWriteFutureCallback):
+
+    result = None
+
+    def do(self, state, result):
+        self.result = result
+
+
+class TestMagicWritev(TestCase):
+
+    def testWritev(self):
+        loop = ruv.alloc_loop()
+        r, w = os.pipe()
+        try:
+            pipe = ruv.alloc_pipe(loop)
+            ruv.pipeOpen(pipe, w)
+            stream = ruv.rffi.cast(ruv.stream_tp, pipe)
+            k = WriteResult()
+            ruv.magic_writev(stream, ["ab", "", "cde"]).run(None, k)
+            ruv.run(loop, ruv.RUN_DEFAULT)
+            self.assertEqual(k.result, (OK, 5, None))
+            self.assertEqual(os.read(r, 10), "abcde")
+            ruv.closeAndFree(stream)
+            ruv.run(loop, ruv.RUN_DEFAULT)
+        finally:
+            os.close(r)
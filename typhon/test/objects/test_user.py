@@ -0,0 +1,137 @@
+from unittest import TestCase
+
+from typhon.objects.collections.helpers import monteSet
+from typhon.objects.constants import NullObject
+from typhon.objects.data import IntObject
+from typhon.objects.user import (CABINET_SIZE, AuditClipboard, AuditorReport,
+                                 ReportKey, reportKeyEq, reportKeyHash)
+
+
+class FakeGuardInfo(object):
+
+    def __init__(self, guards=None):
+        self.guards = guards
+
+    def clean(self):
+        pass
+
+    def hasDynamicGuards(self):
+        return self.guards is not None
+
+    def dynamicGuards(self):
+        return self.guards
+
+    def isDynamic(self):
+        return self.guards is not None
+
+
+def auditors(i):
+    return [IntObject(i)]
+
+
+def report(isDynamic=False):
+    return AuditorReport(monteSet(), isDynamic)
+
+
+class TestReportKey(TestCase):
+
+    def testEqualStatic(self):
+        first = ReportKey(auditors(1), None)
+        second = ReportKey(auditors(1), None)
+        self.assertTrue(reportKeyEq(first, second))
+        self.assertEqual(reportKeyHash(first), reportKeyHash(second))
+
+    def testEqualDynamic(self):
+        first = ReportKey(auditors(1), [IntObject(2)])
+        second = ReportKey(auditors(1), [IntObject(2)])
+        self.assertTrue(reportKeyEq(first, second))
+        self.assertEqual(reportKeyHash(first), reportKeyHash(second))
+
+    def testAuditorsDiffer(self):
+        first = ReportKey(auditors(1), None)
+        second = ReportKey(auditors(2), None)
+        self.assertFalse(reportKeyEq(first, second))
+
+    def testStaticIsNotDynamic(self):
+        first = ReportKey(auditors(1), None)
+        second = ReportKey(auditors(1), [])
+        self.assertFalse(reportKeyEq(first, second))
+        self.assertFalse(reportKeyEq(second, first))
+        self.assertNotEqual(reportKeyHash(first), reportKeyHash(second))
+
+    def testGuardsDiffer(self):
+        first = ReportKey(auditors(1), [IntObject(2)])
+        second = ReportKey(auditors(1), [IntObject(3)])
+        self.assertFalse(reportKeyEq(first, second))
+
+
+class TestAuditClipboard(TestCase):
+
+    def setUp(self):
+        self.clipboard = AuditClipboard(u"test", NullObject)
+
+    def testMiss(self):
+        self.assertIs(self.clipboard.getReport(auditors(1),
+                                               FakeGuardInfo()), None)
+
+    def testStaticHit(self):
+        r = report()
+        self.clipboard.putReport(auditors(1), FakeGuardInfo(), r)
+        # Static reports are found whatever the dynamic guards are.
+        self.assertIs(self.clipboard.getReport(auditors(1),
+                                               FakeGuardInfo()), r)
+        self.assertIs(self.clipboard.getReport(
+            auditors(1), FakeGuardInfo([IntObject(2)])), r)
+
+    def testDynamicHit(self):
+        r = report(isDynamic=True)
+        guardInfo = FakeGuardInfo([IntObject(2)])
+        self.clipboard.putReport(auditors(1), guardInfo, r)
+        self.assertIs(self.clipboard.getReport(auditors(1), guardInfo), r)
+        self.assertIs(self.clipboard.getReport(
+            auditors(1), FakeGuardInfo([IntObject(3)])), None)
+
+    def testEviction(self):
+        reports = [report() for i in range(CABINET_SIZE + 1)]
+        for i, r in enumerate(reports):
+            self.clipboard.putReport(auditors(i), FakeGuardInfo(), r)
+        self.assertEqual(len(self.clipboard.reportCabinet), CABINET_SIZE)
+        self.assertIs(self.clipboard.getReport(auditors(0),
+                                               FakeGuardInfo()), None)
+        self.assertIs(self.clipboard.getReport(auditors(CABINET_SIZE),
+                                               FakeGuardInfo()),
+                      reports[CABINET_SIZE])
+
+    def testEvictionLeastRecentlyUsed(self):
+        reports = [report() for i in range(CABINET_SIZE)]
+        for i, r in enumerate(reports):
+            self.clipboard.putReport(auditors(i), FakeGuardInfo(), r)
+        # Using the oldest report saves it from eviction.
+        self.clipboard.getReport(auditors(0), FakeGuardInfo())
+        self.clipboard.putReport(auditors(-1), FakeGuardInfo(), report())
+        self.assertIs(self.clipboard.getReport(auditors(0),
+                                               FakeGuardInfo()), reports[0])
+        self.assertIs(self.clipboard.getReport(auditors(1),
+                                               FakeGuardInfo()), None)
+
+    def testNewestHitKeepsOrder(self):
+        first = report()
+        second = report()
+        self.clipboard.putReport(auditors(1), FakeGuardInfo(), first)
+        self.clipboard.putReport(auditors(2), FakeGuardInfo(), second)
+        self.clipboard.getReport(auditors(2), FakeGuardInfo())
+        self.assertEqual(self.clipboard.reportCabinet.values(),
+                         [first, second])
+        self.clipboard.getReport(auditors(1), FakeGuardInfo())
+        self.assertEqual(self.clipboard.reportCabinet.values(),
+                         [second, first])
+        self.assertIs(self.clipboard.newestReport, first)
+
+    def testAuditRate(self):
+        rate = self.clipboard.reportRate
+        total, success = rate.total, rate.success
+        first = self.clipboard.audit([], FakeGuardInfo())
+        second = self.clipboard.audit([], FakeGuardInfo())
+        self.assertIs(first, second)
+        self.assertEqual(rate.total - total, 2)
+        self.assertEqual(rate.success - success, 1)
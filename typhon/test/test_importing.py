@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+from typhon.importing import AstModule, CompileCache
+from typhon.load.nano import MAGIC
+from typhon.metrics import Recorder
+from typhon.objects.data import IntObject
+from typhon.objects.guards import anyGuard
+from typhon.objects.root import tieMirandaKnot
+from typhon.objects.slots import finalBinding
+from typhon.test.load.test_nano import varint
+
+tieMirandaKnot()
+
+
+def mastStr(s):
+    return varint(len(s)) + s
+
+# def y := x; y
+MAST = (MAGIC + "\x00" +
+        "N" + mastStr("x") +
+        "LN" +
+        "PF" + mastStr("y") + varint(1) +
+        "LN" +
+        "D" + varint(0) + varint(2) + varint(0) +
+        "N" + mastStr("y") +
+        "S" + varint(2) + varint(3) + varint(4))
+
+
+def module(source=MAST, origin=u"<test>"):
+    mod = AstModule(Recorder(), origin)
+    mod.load(source)
+    return mod
+
+def env(x, **others):
+    rv = {u"x": finalBinding(x, anyGuard)}
+    for name, value in others.items():
+        rv[name.decode("utf-8")] = finalBinding(value, anyGuard)
+    return rv
+
+
+class TestCompileCache(TestCase):
+
+    def setUp(self):
+        self.cache = CompileCache()
+
+    def testEval(self):
+        x = IntObject(5)
+        result, topLocals = self.cache.eval(module(), env(x))
+        self.assertTrue(result is x)
+        self.assertEqual([name for name, _ in topLocals], [u"y"])
+
+    def testSameScope(self):
+        e = env(IntObject(5))
+        self.cache.eval(module(), e)
+        entry = self.cache.cache[module().cacheKey()]
+        mixed = entry.mixed
+        mod = module()
+        self.cache.eval(mod, e)
+        # Neither decoded nor mixed again.
+        self.assertTrue(mod.astSource is None)
+        self.assertTrue(entry.mixed is mixed)
+
+    def testSameNames(self):
+        self.cache.eval(module(), env(IntObject(5)))
+        entry = self.cache.cache[module().cacheKey()]
+        mixed = entry.mixed
+        mod = module()
+        x = IntObject(6)
+        result, _ = self.cache.eval(mod, env(x))
+        # Mixed with the new value, but not decoded again.
+        self.assertTrue(result is x)
+        self.assertTrue(mod.astSource is None)
+        self.assertFalse(entry.mixed is mixed)
+
+    def testOtherNames(self):
+        self.cache.eval(module(), env(IntObject(5)))
+        mod = module()
+        x = IntObject(6)
+        result, _ = self.cache.eval(mod, env(x, z=IntObject(7)))
+        self.assertTrue(result is x)
+        self.assertFalse(mod.astSource is None)
+
+    def testKeys(self):
+        key = module().cacheKey()
+        self.assertEqual(module().cacheKey(), key)
+        self.assertNotEqual(module(origin=u"<other>").cacheKey(), key)
+        self.assertNotEqual(module(MAST.replace("y", "w")).cacheKey(), key)
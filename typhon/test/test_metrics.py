@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+from typhon.metrics import (BUCKETS, Histogram, bucketFor, dumpJSON,
+                            dumpPrometheus)
+
+
+class TestHistogram(TestCase):
+
+    def testBucketFor(self):
+        self.assertEqual(bucketFor(0.0), 0)
+        self.assertEqual(bucketFor(0.000001), 0)
+        self.assertEqual(bucketFor(0.000003), 2)
+        self.assertEqual(bucketFor(1000.0), BUCKETS)
+
+    def testObserve(self):
+        h = Histogram()
+        h.observe(0.5)
+        h.observe(0.25)
+        self.assertEqual(h.count, 2)
+        self.assertEqual(h.total, 0.75)
+        self.assertEqual(sum(h.counts), 2)
+
+    def testCopy(self):
+        h = Histogram()
+        h.observe(0.5)
+        c = h.copy()
+        h.observe(0.5)
+        self.assertEqual(c.count, 1)
+        self.assertEqual(sum(c.counts), 1)
+
+
+class TestDump(TestCase):
+
+    def testJSON(self):
+        h = Histogram()
+        h.observe(2000.0)
+        json = dumpJSON({"io": h}, [("pa", {}, {})])
+        self.assertTrue(json.startswith('{"histograms": {"io": {"count": 1'))
+        self.assertTrue('["+Inf", 1]' in json)
+        self.assertTrue(json.endswith('"vats": {"pa": {"histograms": {}, '
+                                      '"gauges": {}}}}'))
+
+    def testJSONGauges(self):
+        json = dumpJSON({}, [("pa", {}, {"turn queue high water": 5})])
+        self.assertEqual(json, '{"histograms": {}, "vats": {"pa": '
+                         '{"histograms": {}, "gauges": '
+                         '{"turn queue high water": 5}}}}')
+
+    def testPrometheus(self):
+        h = Histogram()
+        h.observe(0.5)
+        text = dumpPrometheus({}, [("pa", {"turn latency": h}, {})])
+        lines = text.split("\n")
+        self.assertEqual(lines[0],
+                         "# TYPE typhon_turn_latency_seconds histogram")
+        self.assertTrue('typhon_turn_latency_seconds_bucket{vat="pa",'
+                        'le="+Inf"} 1' in lines)
+        self.assertTrue('typhon_turn_latency_seconds_count{vat="pa"} 1'
+                        in lines)
+
+    def testPrometheusGauges(self):
+        text = dumpPrometheus({}, [("pa", {}, {"turn queue high water": 5})])
+        self.assertEqual(text.split("\n"), [
+            "# TYPE typhon_turn_queue_high_water gauge",
+            'typhon_turn_queue_high_water{vat="pa"} 5',
+            "",
+        ])
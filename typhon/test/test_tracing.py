@@ -0,0 +1,55 @@
+from unittest import TestCase
+
+from typhon.metrics import jsonString
+from typhon.tracing import Tracer
+
+
+class TestTracer(TestCase):
+
+    def testDisabled(self):
+        t = Tracer(capacity=4)
+        self.assertFalse(t.enabled)
+        self.assertEqual(t.begin(), 0.0)
+        self.assertEqual(t.spans(), [])
+
+    def testLazyBuffer(self):
+        t = Tracer(capacity=4)
+        self.assertIs(t._spans, None)
+        t.start()
+        spans = t._spans
+        self.assertEqual(len(spans), 4)
+        t.stop()
+        t.start()
+        self.assertIs(t._spans, spans)
+
+    def testRingKeepsNewest(self):
+        t = Tracer(capacity=2)
+        t.start()
+        for i in range(3):
+            t.record("turn", "vat", u"pa", u"%d" % i, t.begin())
+        self.assertEqual([span[3] for span in t.spans()], [u"1", u"2"])
+
+    def testStartClears(self):
+        t = Tracer(capacity=2)
+        t.start()
+        t.record("turn", "vat", u"pa", u"", t.begin())
+        t.start()
+        self.assertEqual(t.spans(), [])
+        t.record("turn", "vat", u"pa", u"again", t.begin())
+        self.assertEqual([span[3] for span in t.spans()], [u"again"])
+
+    def testJSON(self):
+        t = Tracer(capacity=4)
+        t.start()
+        t.record("turn", "vat", u"pa", u"x <- run/0", t.begin())
+        json = t.toJSON()
+        self.assertTrue(json.startswith('{"traceEvents": [{"name": '
+                                        '"thread_name", "ph": "M"'))
+        self.assertTrue('"name": "turn", "cat": "vat", "ph": "X"' in json)
+        self.assertTrue('"args": {"detail": "x <- run/0"}' in json)
+
+
+class TestJSONString(TestCase):
+
+    def testEscapes(self):
+        self.assertEqual(jsonString('a"b\\c\n'), '"a\\"b\\\\c\\u000a"')
@@ -1,6 +1,12 @@
 from unittest import TestCase
 
-from typhon.vats import Vat, VatCheckpointed
+from typhon.atoms import getAtom
+from typhon.metrics import latencies
+from typhon.objects.collections.maps import EMPTY_MAP
+from typhon.objects.data import IntObject
+from typhon.vats import TurnQueue, Vat, VatCheckpointed
+
+ADD_1 = getAtom(u"add", 1)
 
 class TestVat(TestCase):
 
@@ -35,3 +41,76 @@ class TestVat(TestCase):
         v = Vat(None, None, name=u"test", checkpoints=2)
         # 2 isn't enough for a deduction of 3.
         self.assertRaises(VatCheckpointed, v.checkpoint, points=3)
+
+    def testLatenciesOff(self):
+        v = Vat(None, None, name=u"test", checkpoints=-1)
+        v.sendOnly(IntObject(1), ADD_1, [IntObject(2)], EMPTY_MAP)
+        v.takeTurn()
+        self.assertEqual(v.queueWait.count, 0)
+        self.assertEqual(v.turnLatency.count, 0)
+
+    def testLatenciesOn(self):
+        v = Vat(None, None, name=u"test", checkpoints=-1)
+        # Queued before latencies were on, so it has no wait.
+        v.sendOnly(IntObject(1), ADD_1, [IntObject(2)], EMPTY_MAP)
+        latencies.start()
+        try:
+            v.sendOnly(IntObject(1), ADD_1, [IntObject(2)], EMPTY_MAP)
+            v.takeTurn()
+            v.takeTurn()
+        finally:
+            latencies.stop()
+        self.assertEqual(v.queueWait.count, 1)
+        self.assertEqual(v.turnLatency.count, 2)
+
+    def testGauges(self):
+        v = Vat(None, None, name=u"test", checkpoints=-1)
+        for i in range(3):
+            v.sendOnly(IntObject(1), ADD_1, [IntObject(2)], EMPTY_MAP)
+        v.takeTurn()
+        gauges = v.getGauges()
+        self.assertEqual(gauges["turn queue high water"], 3)
+        self.assertEqual(gauges["callback queue high water"], 0)
+
+
+class TestTurnQueue(TestCase):
+
+    def testFIFO(self):
+        q = TurnQueue()
+        q.push((None, 1, None, None, None))
+        q.push((None, 2, None, None, None))
+        self.assertEqual(q.pop()[1], 1)
+        self.assertEqual(q.pop()[1], 2)
+        self.assertEqual(q.size(), 0)
+
+    def testPopEmpty(self):
+        q = TurnQueue()
+        self.assertRaises(IndexError, q.pop)
+
+    def testOldestTime(self):
+        q = TurnQueue(capacity=2)
+        for i in range(3):
+            q.push((None, i, None, None, None), float(i))
+        q.pop()
+        self.assertEqual(q.oldestTime(), 1.0)
+
+    def testGrowWrapped(self):
+        q = TurnQueue(capacity=4)
+        # Move the head so that the ring wraps before it grows.
+        for i in range(3):
+            q.push((None, i, None, None, None))
+        q.pop()
+        q.pop()
+        for i in range(3, 10):
+            q.push((None, i, None, None, None))
+        self.assertEqual([send[1] for send in q.sends()], range(2, 10))
+        self.assertEqual([q.pop()[1] for _ in range(8)], range(2, 10))
+
+    def testHighWater(self):
+        q = TurnQueue()
+        for i in range(5):
+            q.push((None, i, None, None, None))
+        for i in range(5):
+            q.pop()
+        q.push((None, 0, None, None, None))
+        self.assertEqual(q.highWater, 5)
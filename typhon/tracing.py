@@ -0,0 +1,139 @@
+"""
+Timed spans of the VM's work, for the Chrome trace viewer and Perfetto.
+
+Tracing is off by default. While it is on, each vat turn, batch of I/O
+events, reactor wait, compilation, and module load is recorded as a span in
+a fixed-size ring buffer, so that a long-running process only remembers its
+most recent spans. The buffer can be written out at any time as a Chrome
+trace JSON file.
+"""
+
+import os
+
+from typhon.metrics import jsonString, monotonic
+
+# How many spans the ring buffer holds.
+TRACE_CAPACITY = 1 << 16
+
+EMPTY_SPAN = "", "", u"", u"", 0.0, 0.0
+
+
+class Tracer(object):
+    """
+    A ring buffer of completed spans.
+
+    Each span has a name, a category, the name of the vat it happened in, a
+    free-form detail, and its start and end times.
+    """
+
+    _immutable_fields_ = "enabled?",
+
+    enabled = False
+
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self._capacity = capacity
+        # Allocated when tracing first starts, so that an untraced process
+        # (and the translated binary) doesn't carry the buffer around.
+        self._spans = None
+        self._next = 0
+        self._count = 0
+        self._origin = 0.0
+
+    def start(self):
+        if self._spans is None:
+            self._spans = [EMPTY_SPAN] * self._capacity
+        self.clear()
+        self._origin = monotonic()
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def clear(self):
+        # Stale spans are left in the buffer; spans() only reads the newest
+        # _count of them, and they are overwritten as the ring wraps.
+        self._next = 0
+        self._count = 0
+
+    def begin(self):
+        """
+        The starting time for a span which will be recorded.
+
+        The result is meaningless when tracing is off.
+        """
+
+        return monotonic() if self.enabled else 0.0
+
+    def record(self, name, category, vat, detail, start):
+        """
+        Record a span which started at `start` and ends now.
+
+        Callers should check `enabled` before preparing the detail.
+        """
+
+        end = monotonic()
+        assert self._spans is not None, "tracer was never started"
+        self._spans[self._next] = name, category, vat, detail, start, end
+        self._next = (self._next + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+
+    def spans(self):
+        """
+        The recorded spans, oldest first.
+        """
+
+        if self._spans is None:
+            return []
+        capacity = self._capacity
+        first = (self._next - self._count) % capacity
+        return [self._spans[(first + i) % capacity]
+                for i in range(self._count)]
+
+    def toJSON(self):
+        """
+        Render the recorded spans as a Chrome trace.
+
+        Each vat becomes a thread of the trace, named after the vat.
+        """
+
+        threads = {}
+        events = []
+        for name, category, vat, detail, start, end in self.spans():
+            if vat not in threads:
+                tid = len(threads) + 1
+                threads[vat] = tid
+                events.append('{"name": "thread_name", "ph": "M", '
+                              '"pid": 1, "tid": %d, "args": {"name": %s}}'
+                              % (tid, jsonString(vat.encode("utf-8"))))
+            # Timestamps and durations are in microseconds.
+            events.append('{"name": %s, "cat": %s, "ph": "X", "ts": %d, '
+                          '"dur": %d, "pid": 1, "tid": %d, '
+                          '"args": {"detail": %s}}'
+                          % (jsonString(name), jsonString(category),
+                             int((start - self._origin) * 1000000),
+                             int((end - start) * 1000000), threads[vat],
+                             jsonString(detail.encode("utf-8"))))
+        return '{"traceEvents": [%s]}' % ", ".join(events)
+
+    def dump(self, path):
+        """
+        Write the recorded spans to a Chrome trace file at `path`.
+        """
+
+        data = self.toJSON()
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0644)
+        try:
+            while data:
+                written = os.write(fd, data)
+                data = data[written:]
+        finally:
+            os.close(fd)
+
+tracer = Tracer()
+
+
+def currentVatName():
+    from typhon.vats import currentVat
+    vat = currentVat.get()
+    return vat.name if vat is not None else u""
@@ -20,12 +20,94 @@ from typhon import log
 from typhon.atoms import getAtom
 from typhon.autohelp import autohelp, method
 from typhon.errors import Ejecting, UserException, userError
+from typhon.metrics import Histogram, latencies, monotonic
 from typhon.objects.auditors import deepFrozenStamp
 from typhon.objects.root import Object
+from typhon.tracing import tracer
 
 
 RUN_0 = getAtom(u"run", 0)
 
+# The filler for unoccupied slots in a turn queue. Kept around so that
+# popped sends don't stay reachable from the ring.
+EMPTY_SEND = None, None, None, None, None
+
+
+class TurnQueue(object):
+    """
+    A FIFO of pending sends, backed by a growable ring buffer.
+
+    Pushing and popping are both constant-time; the ring only copies when
+    it has to double in size. Alongside each send, the queue remembers when
+    it was pushed.
+    """
+
+    _head = 0
+    _count = 0
+
+    # The deepest that this queue has ever been.
+    highWater = 0
+
+    def __init__(self, capacity=16):
+        assert capacity > 0 and not capacity & (capacity - 1), \
+                "Capacity must be a power of two"
+        self._ring = [EMPTY_SEND] * capacity
+        self._times = [0.0] * capacity
+
+    def size(self):
+        return self._count
+
+    def _grow(self):
+        ring = self._ring
+        capacity = len(ring)
+        mask = capacity - 1
+        new = [EMPTY_SEND] * (capacity * 2)
+        times = [0.0] * (capacity * 2)
+        for i in range(self._count):
+            new[i] = ring[(self._head + i) & mask]
+            times[i] = self._times[(self._head + i) & mask]
+        self._ring = new
+        self._times = times
+        self._head = 0
+
+    def push(self, send, when=0.0):
+        if self._count == len(self._ring):
+            self._grow()
+        mask = len(self._ring) - 1
+        self._ring[(self._head + self._count) & mask] = send
+        self._times[(self._head + self._count) & mask] = when
+        self._count += 1
+        if self._count > self.highWater:
+            self.highWater = self._count
+
+    def oldestTime(self):
+        """
+        When the next send to be popped was pushed.
+        """
+
+        if not self._count:
+            raise IndexError("peek at empty turn queue")
+        return self._times[self._head]
+
+    def pop(self):
+        if not self._count:
+            raise IndexError("pop from empty turn queue")
+        mask = len(self._ring) - 1
+        send = self._ring[self._head]
+        self._ring[self._head] = EMPTY_SEND
+        self._head = (self._head + 1) & mask
+        self._count -= 1
+        return send
+
+    def sends(self):
+        """
+        A snapshot of the pending sends, oldest first.
+        """
+
+        mask = len(self._ring) - 1
+        return [self._ring[(self._head + i) & mask]
+                for i in range(self._count)]
+
 
 class VatCheckpointed(Exception):
     """The raising vat decided to abort its current turn.
@@ -56,9 +138,15 @@ class Vat(Object):
             self.name = name
 
         self._callbacks = []
+        # The deepest that the callback queue has ever been.
+        self.callbackHighWater = 0
 
         self._pendingLock = allocate_lock()
-        self._pending = []
+        self._pending = TurnQueue()
+
+        # How long sends wait in the queue, and how long their turns take.
+        self.queueWait = Histogram()
+        self.turnLatency = Histogram()
 
     def log(self, message, tags=[]):
         log.log(["vat"] + tags, u"Vat %s: %s" % (self.name, message))
@@ -69,7 +157,7 @@ class Vat(Object):
         else:
             checkpoints = u"immortal"
         return u"<vat(%s, %s, %d turns pending)>" % (self.name, checkpoints,
-                                                     len(self._pending))
+                                                     self._pending.size())
 
     @method("Any", "Any")
     def seed(self, f):
@@ -97,7 +185,7 @@ class Vat(Object):
 
         vat = Vat(self._manager, self.uv_loop, name,
                   checkpoints=checkpoints)
-        self._manager.vats.append(vat)
+        self._manager.addVat(vat)
         return vat
 
     @method("Void")
@@ -107,7 +195,7 @@ class Vat(Object):
         """
         from typhon.objects.printers import toString
         debug_print("Pending queue for " + self.name.encode("utf-8"))
-        for (resolver, target, atom, args, namedArgs) in self._pending:
+        for (resolver, target, atom, args, namedArgs) in self._pending.sends():
             debug_print(toString(target).encode('utf-8') +
                         "." + atom.verb.encode('utf-8') + "(" +
                         ', '.join([toString(a).encode('utf-8')
@@ -130,7 +218,8 @@ class Vat(Object):
         from typhon.objects.refs import makePromise
         promise, resolver = makePromise()
         with self._pendingLock:
-            self._pending.append((resolver, target, atom, args, namedArgs))
+            self._pending.push((resolver, target, atom, args, namedArgs),
+                               latencies.now())
             # self.log(u"Planning to send: %s<-%s(%s) (resolver: yes)" %
             #          (target.toQuote(), atom.verb,
             #           u", ".join([arg.toQuote() for arg in args])))
@@ -138,7 +227,8 @@ class Vat(Object):
 
     def sendOnly(self, target, atom, args, namedArgs):
         with self._pendingLock:
-            self._pending.append((None, target, atom, args, namedArgs))
+            self._pending.push((None, target, atom, args, namedArgs),
+                               latencies.now())
             # self.log(u"Planning to send: %s<-%s(%s) (resolver: no)" %
             #          (target.toQuote(), atom.verb,
             #           u", ".join([arg.toQuote() for arg in args])))
@@ -149,23 +239,43 @@ class Vat(Object):
         # we'll take zero turns and then run our callbacks. This prevents
         # callbacks prepared in the initial turn from being skipped in the
         # event that there are no queued turns.
-        return len(self._pending) or len(self._callbacks)
+        return self._pending.size() or len(self._callbacks)
 
     def takeTurn(self):
+        with self._pendingLock:
+            sent = self._pending.oldestTime()
+            resolver, target, atom, args, namedArgs = self._pending.pop()
+
+        # The clock is only read when somebody wants the time.
+        timed = latencies.enabled
+        start = monotonic() if timed or tracer.enabled else 0.0
+        # Sends queued before latencies were turned on have no time.
+        if timed and sent:
+            self.queueWait.observe(start - sent)
+        try:
+            self._takeTurn(resolver, target, atom, args, namedArgs)
+        finally:
+            if timed:
+                self.turnLatency.observe(monotonic() - start)
+            if tracer.enabled:
+                tracer.record("turn", "vat", self.name,
+                              u"%s <- %s/%d" % (target.getFQN(), atom.verb,
+                                                atom.arity), start)
+
+    def _takeTurn(self, resolver, target, atom, args, namedArgs):
+        from typhon.objects.collections.maps import (hasMirandaFail,
+                                                     withMirandaFail)
         from typhon.objects.exceptions import sealException
         from typhon.objects.refs import Promise, resolution
 
-        with self._pendingLock:
-            resolver, target, atom, args, namedArgs = self._pending.pop(0)
-
         # Set up our Miranda FAIL.
-        if namedArgs.extractStringKey(u"FAIL", None) is None:
+        if not hasMirandaFail(namedArgs):
             if resolver is not None:
                 FAIL = resolver.makeSmasher()
             else:
                 from typhon.objects.ejectors import theThrower
                 FAIL = theThrower
-            namedArgs = namedArgs.withStringKey(u"FAIL", FAIL)
+            namedArgs = withMirandaFail(namedArgs, FAIL)
 
         # If the target is a promise, then we should send to it instead of
         # calling. Try to resolve it as much as possible first, though.
@@ -208,21 +318,35 @@ class Vat(Object):
             if resolver is not None:
                 resolver.smash(sealException(userError(u"Ejector tried to escape from vat")))
 
+    def getHistograms(self):
+        return {"queue wait": self.queueWait, "turn latency": self.turnLatency}
+
+    def getGauges(self):
+        return {"turn queue high water": self._pending.highWater,
+                "callback queue high water": self.callbackHighWater}
+
     def runEvents(self):
+        start = tracer.begin()
         with self._pendingLock:
+            count = len(self._callbacks)
             for event in self._callbacks:
                 event.run()
             del self._callbacks[:]
+        if tracer.enabled and count:
+            tracer.record("events", "vat", self.name, u"%d events" % count,
+                          start)
 
     def enqueueEvent(self, event):
         with self._pendingLock:
             self._callbacks.append(event)
+            if len(self._callbacks) > self.callbackHighWater:
+                self.callbackHighWater = len(self._callbacks)
 
     def takeSomeTurns(self):
         # Limit the number of continuous turns to keep network latency low.
         # It's possible that more turns will be queued while we're taking
         # these turns, after all.
-        count = len(self._pending)
+        count = self._pending.size()
         # print "Taking", count, "turn(s) on", self.repr()
         if not count:
             self.runEvents()
@@ -259,13 +383,32 @@ class scopedVat(object):
 class VatManager(object):
     """
     A collection of vats.
+
+    All vats are scheduled round-robin on the thread which owns the reactor.
+    Sprouted vats are isolated, but not parallel: the vats share a single
+    libuv loop, `currentVat` is a thread-local, and RPython's GC does not
+    permit Monte objects to be touched from more than one thread at a time.
     """
 
     def __init__(self):
         self.vats = []
 
+    def addVat(self, vat):
+        self.vats.append(vat)
+
     def anyVatHasTurns(self):
         for vat in self.vats:
             if vat.hasTurns():
                 return True
         return False
+
+    def takeSomeTurns(self, recorder):
+        """
+        Give each vat with pending work a chance to take some turns.
+        """
+
+        for vat in self.vats:
+            if vat.hasTurns():
+                with scopedVat(vat) as vat:
+                    with recorder.context(u"vatturn"):
+                        vat.takeSomeTurns()